@@ -0,0 +1,104 @@
+import pygame
+import os
+from typing import Dict, Optional, Tuple
+
+SPRITE_DIR = os.path.join(os.path.dirname(__file__), "assets", "sprites")
+# Sized requests are scaled from a copy shrunk to at most this many pixels per side,
+# so a source PNG several thousand pixels wide isn't kept in memory just to draw it at 64px.
+# get_image(filename) without a size always returns the original.
+MASTER_MAX_SIZE = 256
+
+class AssetManager:
+    # Process-wide image cache keyed by (filename, size)
+    # Each PNG is decoded once and every caller shares the same Surface
+    def __init__(self, base_path: str = SPRITE_DIR):
+        self.base_path = base_path
+        self.images: Dict[Tuple[str, Optional[Tuple[int, int]]], pygame.Surface] = {}
+        self.masters: Dict[str, pygame.Surface] = {}  # Shrunk sources for sized requests (see MASTER_MAX_SIZE)
+        self.missing = set()  # Filenames that are known not to exist
+        self.hits = 0
+        self.misses = 0
+        self.disk_loads = 0
+
+    def _load(self, filename: str) -> pygame.Surface:
+        # Decode a sprite from disk, converting it for fast blitting when a display exists
+        if filename in self.missing:
+            raise FileNotFoundError(filename)
+        path = os.path.join(self.base_path, filename)
+        try:
+            image = pygame.image.load(path)
+        except FileNotFoundError:
+            self.missing.add(filename)
+            raise
+        self.disk_loads += 1
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        return image
+
+    def _source_for(self, filename: str, size: Tuple[int, int]) -> pygame.Surface:
+        # The image a sized variant is scaled from: the original if it is cached anyway or the size is
+        # above the cap, otherwise a copy shrunk to MASTER_MAX_SIZE (the full-size original isn't kept)
+        original = self.images.get((filename, None))
+        if original is not None or max(size) > MASTER_MAX_SIZE:
+            return original if original is not None else self.get_image(filename)
+        master = self.masters.get(filename)
+        if master is None:
+            master = self._load(filename)
+            width, height = master.get_size()
+            if max(width, height) > MASTER_MAX_SIZE:
+                ratio = MASTER_MAX_SIZE / max(width, height)
+                master_size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+                if master.get_bitsize() in (24, 32):
+                    master = pygame.transform.smoothscale(master, master_size)
+                else:
+                    master = pygame.transform.scale(master, master_size)
+            self.masters[filename] = master
+        return master
+
+    def get_image(self, filename: str, size: Optional[Tuple[int, int]] = None) -> pygame.Surface:
+        # Return the shared Surface for filename, scaled to size if one is given
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (filename, size)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        self.misses += 1
+        if size is None:
+            image = self._load(filename)
+        else:
+            image = pygame.transform.scale(self._source_for(filename, size), size)
+        self.images[key] = image
+        return image
+
+    def bytes_held(self) -> int:
+        # Approximate pixel memory held by all cached surfaces
+        surfaces = list(self.images.values()) + list(self.masters.values())
+        return sum(image.get_pitch() * image.get_height() for image in surfaces)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_loads': self.disk_loads,
+            'surfaces': len(self.images),
+            'bytes': self.bytes_held(),
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{stats['surfaces']} surfaces, {stats['bytes'] // 1024} KB, "
+                f"{stats['hits']} hits, {stats['misses']} misses, {stats['disk_loads']} disk loads")
+
+    def clear(self) -> None:
+        # Drop every cached surface (counters are kept)
+        self.images.clear()
+        self.masters.clear()
+        self.missing.clear()
+
+# Shared instance used by the map, player, NPCs and items
+assets = AssetManager()
+
+def get_image(filename: str, size: Optional[Tuple[int, int]] = None) -> pygame.Surface:
+    return assets.get_image(filename, size)
@@ -1,4 +1,5 @@
 import pygame
+from fonts import get_font, render_text
 
 class Button:
     def __init__(self, x, y, width, height, text, font_size=40, color=(255, 255, 255), 
@@ -11,7 +12,7 @@ class Button:
         self.text_color = text_color
         self.hover_text_color = hover_text_color
         self.is_hovered = False
-        self.font = pygame.font.SysFont("Arial", font_size)
+        self.font = get_font("Arial", font_size)
         
     def draw(self, screen):
         # Draw button background
@@ -21,7 +22,7 @@ class Button:
         
         # Draw text
         text_color = self.hover_text_color if self.is_hovered else self.text_color
-        text_surface = self.font.render(self.text, True, text_color)
+        text_surface = render_text(self.font, self.text, text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
         
@@ -0,0 +1,104 @@
+import math
+from typing import Iterable
+from tilemap import TileMap
+
+SOLID_TILES = (1,)  # Tile ids that block movement (walls)
+
+class CollisionGrid:
+    # Solid/walkable bitmap built from a TileMap (one byte per tile, 1 = solid)
+    # Answers rectangle overlap and swept movement queries without touching the tile map
+    def __init__(self, tile_size: int, solid_tiles: Iterable[int] = SOLID_TILES):
+        self.tile_size = tile_size
+        table = bytearray(256)
+        for tile in solid_tiles:
+            table[tile] = 1
+        self.table = bytes(table)
+        self.tile_map = None
+        self.width = 0
+        self.height = 0
+        self.solid = bytearray()
+        self.wall_version = 0  # Bumped whenever walkability changes
+
+    def rebuild(self, tile_map: TileMap) -> None:
+        # Recompute the whole bitmap from the tile map
+        self.tile_map = tile_map
+        self.width = tile_map.width
+        self.height = tile_map.height
+        self.solid = tile_map.data.translate(self.table)
+        self.wall_version += 1
+
+    def update_tile(self, x: int, y: int, tile: int) -> None:
+        # Update a single cell after the tile map changed
+        index = y * self.width + x
+        solid = self.table[tile]
+        if self.solid[index] != solid:
+            self.solid[index] = solid
+            self.wall_version += 1
+
+    def is_solid(self, tile_x: int, tile_y: int) -> bool:
+        # Cells outside the map count as solid
+        if tile_x < 0 or tile_y < 0 or tile_x >= self.width or tile_y >= self.height:
+            return True
+        return self.solid[tile_y * self.width + tile_x] == 1
+
+    def _rows_blocked(self, first_x: int, last_x: int, first_y: int, last_y: int) -> bool:
+        # Check whether any cell in the tile rectangle (inclusive bounds) is solid
+        if first_x < 0 or first_y < 0 or last_x >= self.width or last_y >= self.height:
+            return True
+        width = self.width
+        find = self.solid.find
+        for tile_y in range(first_y, last_y + 1):
+            start = tile_y * width
+            if find(1, start + first_x, start + last_x + 1) != -1:
+                return True
+        return False
+
+    def rect_blocked(self, x: int, y: int, width: int, height: int) -> bool:
+        # Does the pixel rectangle overlap any solid tile?
+        size = self.tile_size
+        return self._rows_blocked(x // size, (x + width - 1) // size, y // size, (y + height - 1) // size)
+
+    def sweep_x(self, x: float, y: int, width: int, height: int, dx: float) -> float:
+        # Move a rectangle horizontally by dx, stopping flush against the first solid column it would
+        # enter, however large dx is (so a long frame can't tunnel through a wall)
+        if dx == 0:
+            return x
+        size = self.tile_size
+        first_y = y // size
+        last_y = (y + height - 1) // size
+        target = x + dx
+        if dx > 0:
+            start_col = (math.floor(x) + width - 1) // size + 1
+            end_col = (math.floor(target) + width - 1) // size
+            for col in range(start_col, end_col + 1):
+                if self._rows_blocked(col, col, first_y, last_y):
+                    return max(x, min(target, col * size - width))
+        else:
+            start_col = math.floor(x) // size - 1
+            end_col = math.floor(target) // size
+            for col in range(start_col, end_col - 1, -1):
+                if self._rows_blocked(col, col, first_y, last_y):
+                    return min(x, max(target, (col + 1) * size))
+        return target
+
+    def sweep_y(self, x: int, y: float, width: int, height: int, dy: float) -> float:
+        # Vertical counterpart of sweep_x
+        if dy == 0:
+            return y
+        size = self.tile_size
+        first_x = x // size
+        last_x = (x + width - 1) // size
+        target = y + dy
+        if dy > 0:
+            start_row = (math.floor(y) + height - 1) // size + 1
+            end_row = (math.floor(target) + height - 1) // size
+            for row in range(start_row, end_row + 1):
+                if self._rows_blocked(first_x, last_x, row, row):
+                    return max(y, min(target, row * size - height))
+        else:
+            start_row = math.floor(y) // size - 1
+            end_row = math.floor(target) // size
+            for row in range(start_row, end_row - 1, -1):
+                if self._rows_blocked(first_x, last_x, row, row):
+                    return min(y, max(target, (row + 1) * size))
+        return target
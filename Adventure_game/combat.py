@@ -1,15 +1,63 @@
 import pygame
 import random
 from typing import Tuple, Optional
+from fonts import get_font, render_text
+import overlays
+
+ENEMY_ATTACK_DELAY_MS = 500  # Default pause before an enemy strikes back
+
+# Damage formulas (shared with the combat simulator in combat_sim.py)
+PLAYER_BASE_DAMAGE = 15  # Bare-handed attack
+PLAYER_DAMAGE_SPREAD = 5  # Attacks deal base +/- this much
+ENEMY_MIN_DAMAGE = 8
+ENEMY_MAX_DAMAGE = 15
+MIN_DAMAGE_TAKEN = 1  # Armor never reduces a hit below this
+
+def build_combat_panel(panel: pygame.Surface) -> None:
+    # Static part of the combat box: background and border
+    width, height = panel.get_size()
+    panel.fill((50, 50, 50))
+    pygame.draw.rect(panel, (200, 200, 200), (0, 0, width, height), 2)
+
+def build_item_menu_panel(panel: pygame.Surface) -> None:
+    # Static part of the item menu: background, border, title and controls hint
+    width, height = panel.get_size()
+    panel.fill((40, 40, 40))
+    pygame.draw.rect(panel, (200, 200, 200), (0, 0, width, height), 2)
+
+    font = get_font("Arial", 24, bold=True)
+    title = render_text(font, "Select Item to Use", (255, 255, 255))
+    title_rect = title.get_rect(center=(width // 2, 25))
+    panel.blit(title, title_rect)
+
+    hint_font = get_font("Arial", 14)
+    hint_text = render_text(hint_font, "Arrow keys to select, Enter to use, Esc to cancel", (150, 150, 150))
+    panel.blit(hint_text, (10, height - 20))
+
+def build_victory_panel(panel: pygame.Surface) -> None:
+    # Static part of the victory screen: box, gold border, banner and divider line
+    width, height = panel.get_size()
+    panel.fill((50, 50, 50))
+    pygame.draw.rect(panel, (255, 215, 0), (0, 0, width, height), 3)
+
+    font = get_font("Arial", 72, bold=True)
+    title = render_text(font, "VICTORY!", (255, 215, 0))  # Gold color
+    title_rect = title.get_rect(center=(width // 2, 80))
+    panel.blit(title, title_rect)
+
+    pygame.draw.line(panel, (255, 215, 0), (50, 140), (width - 50, 140), 2)
 
 class CombatSystem:
-    def __init__(self, player, enemy):
+    def __init__(self, player, enemy, rng=None):
         self.player = player
         self.enemy = enemy
+        self.rng = rng or random  # Seeded generator from the world, or the global random module
         self.is_player_turn = True
         self.combat_active = True
         self.message = ""
         self.selected_item = None
+        # Timed actions waiting to run: [remaining_ms, action] pairs advanced by update()
+        self.pending_actions = []
         # New variables for item menu
         self.show_item_menu = False
         self.selected_item_index = 0
@@ -34,34 +82,60 @@ class CombatSystem:
         self.combat_active = True
         self.is_player_turn = True
         self.message = "Combat started! Select an action!"
+        self.pending_actions = []
+
+    def schedule(self, action: str, delay_ms: float) -> None:
+        # Queue a turn action (e.g. "enemy") to run once delay_ms of game time has passed
+        self.pending_actions.append([delay_ms, action])
+
+    def has_pending_actions(self) -> bool:
+        return bool(self.pending_actions)
+
+    def update(self, dt: float) -> None:
+        # Advance the timed action queue by dt seconds, running every action that comes due
+        if not self.pending_actions:
+            return
+        elapsed = dt * 1000
+        for pending in self.pending_actions:
+            pending[0] -= elapsed
+        # Allow for float rounding so a 500 ms delay takes exactly 30 ticks at 60 Hz
+        due = [action for remaining, action in self.pending_actions if remaining < 1e-6]
+        self.pending_actions = [pending for pending in self.pending_actions if pending[0] >= 1e-6]
+        for action in due:
+            self.process_turn(action)
+
+    def _end_player_turn(self) -> None:
+        # Hand the turn to the enemy, who strikes after its own attack delay
+        self.is_player_turn = False
+        self.schedule("enemy", getattr(self.enemy, 'attack_delay_ms', ENEMY_ATTACK_DELAY_MS))
     
     def player_attack(self) -> Tuple[int, str]:
         # Basic player attack
         # Check if player has equipped weapon
-        base_damage = 15  # Base damage without weapon
+        base_damage = PLAYER_BASE_DAMAGE  # Base damage without weapon
         weapon = self.player.get_equipped_weapon()
         
         if weapon:
-            base_damage += 10  # Additional damage with equipped weapon
+            base_damage += weapon.damage_bonus  # Additional damage from the weapon's definition
             message = f"You attack with your {weapon.name}!"
         else:
             message = "You attack with your bare hands!"
         
         # Add some randomness
-        damage = random.randint(base_damage - 5, base_damage + 5)
+        damage = self.rng.randint(base_damage - PLAYER_DAMAGE_SPREAD, base_damage + PLAYER_DAMAGE_SPREAD)
         
         self.enemy.take_damage(damage)
         return damage, f"{message} You dealt {damage} damage!"
     
     def enemy_attack(self) -> Tuple[int, str]:
         # Enemy attack turn with armor reduction
-        base_damage = random.randint(8, 15)
+        base_damage = self.rng.randint(ENEMY_MIN_DAMAGE, ENEMY_MAX_DAMAGE)
         
         # Get player's defense from armor
         defense = self.player.get_total_defense()
         
         # Reduce damage by defense (minimum 1 damage)
-        damage = max(1, base_damage - defense)
+        damage = max(MIN_DAMAGE_TAKEN, base_damage - defense)
         
         # Get armor name for message if equipped
         armor = self.player.get_equipped_armor()
@@ -81,6 +155,7 @@ class CombatSystem:
     def process_turn(self, action: str, item_index: Optional[int] = None) -> bool:
         # Process a single turn of combat. Returns True if combat should continue.
         if not self.combat_active:
+            self.pending_actions = []
             return False
             
         if action == "enemy" and not self.is_player_turn:
@@ -112,7 +187,7 @@ class CombatSystem:
                     return True  # Keep combat system active for victory screen
                 
                 # Switch to enemy turn if enemy is still alive
-                self.is_player_turn = False
+                self._end_player_turn()
                 
             elif action == "item" and item_index is not None:
                 success, msg = self.use_item(item_index)
@@ -121,13 +196,13 @@ class CombatSystem:
                     return True  # Don't end turn if item use failed
                 
                 # Switch to enemy turn after successful item use
-                self.is_player_turn = False
+                self._end_player_turn()
         
         return True
     
     def draw_equipment_info(self, screen: pygame.Surface, x: int, y: int) -> None:
         # Draw currently equipped items
-        font = pygame.font.SysFont("Arial", 18)
+        font = get_font("Arial", 18)
         
         weapon = self.player.get_equipped_weapon()
         armor = self.player.get_equipped_armor()
@@ -137,7 +212,7 @@ class CombatSystem:
             weapon_text = f"Weapon: {weapon.name}"
         else:
             weapon_text = "Weapon: None"
-        weapon_surface = font.render(weapon_text, True, (200, 200, 200))
+        weapon_surface = render_text(font, weapon_text, (200, 200, 200))
         screen.blit(weapon_surface, (x, y))
         
         # Draw armor info
@@ -145,22 +220,17 @@ class CombatSystem:
             armor_text = f"Armor: {armor.name}"
         else:
             armor_text = "Armor: None"
-        armor_surface = font.render(armor_text, True, (200, 200, 200))
+        armor_surface = render_text(font, armor_text, (200, 200, 200))
         screen.blit(armor_surface, (x, y + 25))
 
     def draw_combat_ui(self, screen: pygame.Surface) -> None:
         # Draw the combat interface
         # Draw semi-transparent overlay for full window
-        overlay = pygame.Surface((1500, 1000))
-        overlay.set_alpha(128)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
+        screen.blit(overlays.get_overlay(screen, 128), (0, 0))
         
-        # Draw combat box - centered and larger
-        pygame.draw.rect(screen, (50, 50, 50), 
-                        (self.combat_x, self.combat_y, self.combat_width, self.combat_height))
-        pygame.draw.rect(screen, (200, 200, 200), 
-                        (self.combat_x, self.combat_y, self.combat_width, self.combat_height), 2)
+        # Draw combat box - centered and larger (built once)
+        screen.blit(overlays.get_panel("combat", (self.combat_width, self.combat_height), build_combat_panel),
+                    (self.combat_x, self.combat_y))
         
         # Draw health bars
         self._draw_health_bar(screen, self.combat_x + 50, self.combat_y + 50, 
@@ -172,10 +242,10 @@ class CombatSystem:
         self.draw_equipment_info(screen, self.combat_x + 50, self.combat_y + 150)
         
         # Draw combat message in center area
-        font = pygame.font.SysFont("Arial", 28, bold=True)
+        font = get_font("Arial", 28, bold=True)
         messages = self.message.split('\n')
         for i, msg in enumerate(messages):
-            msg_surface = font.render(msg, True, (255, 255, 255))
+            msg_surface = render_text(font, msg, (255, 255, 255))
             msg_rect = msg_surface.get_rect(center=(self.combat_x + self.combat_width // 2, 
                                                   self.message_y + i * 40))
             screen.blit(msg_surface, msg_rect)
@@ -197,15 +267,8 @@ class CombatSystem:
         menu_x = (1500 - menu_width) // 2
         menu_y = (1000 - menu_height) // 2
         
-        # Draw semi-transparent overlay for item menu
-        pygame.draw.rect(screen, (40, 40, 40), (menu_x, menu_y, menu_width, menu_height))
-        pygame.draw.rect(screen, (200, 200, 200), (menu_x, menu_y, menu_width, menu_height), 2)
-        
-        # Draw title
-        font = pygame.font.SysFont("Arial", 24, bold=True)
-        title = font.render("Select Item to Use", True, (255, 255, 255))
-        title_rect = title.get_rect(center=(menu_x + menu_width // 2, menu_y + 25))
-        screen.blit(title, title_rect)
+        # Draw item menu box, title and controls hint (built once)
+        screen.blit(overlays.get_panel("item_menu", (menu_width, menu_height), build_item_menu_panel), (menu_x, menu_y))
         
         # Draw item slots
         items = self.player.inventory.items
@@ -226,30 +289,22 @@ class CombatSystem:
             
             # Draw quantity if stackable
             if item.stackable and item.quantity > 1:
-                small_font = pygame.font.SysFont("Arial", 12, bold=True)
-                quantity_text = small_font.render(str(item.quantity), True, (255, 255, 255))
+                small_font = get_font("Arial", 12, bold=True)
+                quantity_text = render_text(small_font, str(item.quantity), (255, 255, 255))
                 screen.blit(quantity_text, (x + self.item_slot_size - 15, y + 5))
         
         # Draw selected item info
         if items and 0 <= self.selected_item_index < len(items):
             item = items[self.selected_item_index]
-            font = pygame.font.SysFont("Arial", 16)
-            name_text = font.render(item.name, True, (255, 255, 255))
-            desc_text = font.render(item.description, True, (200, 200, 200))
+            font = get_font("Arial", 16)
+            name_text = render_text(font, item.name, (255, 255, 255))
+            desc_text = render_text(font, item.description, (200, 200, 200))
             screen.blit(name_text, (menu_x + 10, menu_y + menu_height - 50))
             screen.blit(desc_text, (menu_x + 10, menu_y + menu_height - 30))
-        
-        # Draw controls hint
-        hint_font = pygame.font.SysFont("Arial", 14)
-        hint_text = hint_font.render("Arrow keys to select, Enter to use, Esc to cancel", True, (150, 150, 150))
-        screen.blit(hint_text, (menu_x + 10, menu_y + menu_height - 20))
 
     def draw_victory_screen(self, screen: pygame.Surface) -> None:
         # Draw semi-transparent dark overlay for full window
-        overlay = pygame.Surface((1500, 1000))
-        overlay.set_alpha(180)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
+        screen.blit(overlays.get_overlay(screen, 180), (0, 0))
         
         # Create a victory box
         victory_width = 800
@@ -257,24 +312,18 @@ class CombatSystem:
         victory_x = (1500 - victory_width) // 2
         victory_y = (1000 - victory_height) // 2
         
-        # Draw victory box with border
-        pygame.draw.rect(screen, (50, 50, 50), (victory_x, victory_y, victory_width, victory_height))
-        pygame.draw.rect(screen, (255, 215, 0), (victory_x, victory_y, victory_width, victory_height), 3)
-        
-        # Draw victory banner
-        font = pygame.font.SysFont("Arial", 72, bold=True)
-        title = font.render("VICTORY!", True, (255, 215, 0))  # Gold color
-        title_rect = title.get_rect(center=(750, victory_y + 80))
-        screen.blit(title, title_rect)
+        # Draw victory box with border, banner and decoration (built once)
+        screen.blit(overlays.get_panel("victory", (victory_width, victory_height), build_victory_panel),
+                    (victory_x, victory_y))
         
         # Draw boss defeated message
-        font = pygame.font.SysFont("Arial", 36)
-        msg = font.render(f"You have defeated the {self.enemy.name}!", True, (255, 255, 255))
+        font = get_font("Arial", 36)
+        msg = render_text(font, f"You have defeated the {self.enemy.name}!", (255, 255, 255))
         msg_rect = msg.get_rect(center=(750, victory_y + 180))
         screen.blit(msg, msg_rect)
         
         # Draw battle stats
-        font = pygame.font.SysFont("Arial", 24)
+        font = get_font("Arial", 24)
         stats = [
             f"Your remaining health: {self.player.health}/{self.player.max_health}",
             f"Equipped weapon: {self.player.get_equipped_weapon().name if self.player.get_equipped_weapon() else 'None'}",
@@ -282,28 +331,23 @@ class CombatSystem:
         ]
         
         for i, stat in enumerate(stats):
-            stat_surface = font.render(stat, True, (200, 200, 200))
+            stat_surface = render_text(font, stat, (200, 200, 200))
             stat_rect = stat_surface.get_rect(center=(750, victory_y + 250 + i * 40))
             screen.blit(stat_surface, stat_rect)
         
-        # Draw decorative elements
-        pygame.draw.line(screen, (255, 215, 0), 
-                        (victory_x + 50, victory_y + 140),
-                        (victory_x + victory_width - 50, victory_y + 140), 2)
-        
         # Draw continue prompt with blinking effect
         if self.victory_timer > 60:  # Start showing after 1 second
             if (self.victory_timer // 30) % 2 == 0:  # Blink every half second
-                font = pygame.font.SysFont("Arial", 24)
-                prompt = font.render("Press SPACE to continue...", True, (255, 255, 255))
+                font = get_font("Arial", 24)
+                prompt = render_text(font, "Press SPACE to continue...", (255, 255, 255))
                 prompt_rect = prompt.get_rect(center=(750, victory_y + victory_height - 50))
                 screen.blit(prompt, prompt_rect)
 
     def _draw_health_bar(self, screen: pygame.Surface, x: int, y: int, 
                         current: int, maximum: int, label: str) -> None:
         # Draw a health bar with label
-        font = pygame.font.SysFont("Arial", 20)
-        label_surface = font.render(f"{label}: {current}/{maximum}", True, (255, 255, 255))
+        font = get_font("Arial", 20)
+        label_surface = render_text(font, f"{label}: {current}/{maximum}", (255, 255, 255))
         screen.blit(label_surface, (x, y))
         
         bar_width = 200
@@ -341,16 +385,17 @@ class CombatSystem:
             pygame.draw.rect(screen, (120, 120, 120), rect, 2)
             
             # Draw button text
-            font = pygame.font.SysFont("Arial", 24, bold=True)
-            text_surface = font.render(text, True, (255, 255, 255))
+            font = get_font("Arial", 24, bold=True)
+            text_surface = render_text(font, text, (255, 255, 255))
             text_rect = text_surface.get_rect(center=(rect[0] + rect[2]//2, rect[1] + rect[3]//2))
             screen.blit(text_surface, text_rect)
 
 class Enemy:
-    def __init__(self, name: str, health: int, max_health: int):
+    def __init__(self, name: str, health: int, max_health: int, attack_delay_ms: int = ENEMY_ATTACK_DELAY_MS):
         self.name = name
         self.health = health
         self.max_health = max_health
+        self.attack_delay_ms = attack_delay_ms  # Pause before this enemy takes its turn
         
     def take_damage(self, amount: int) -> None:
         self.health = max(0, self.health - amount)
@@ -0,0 +1,262 @@
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from combat import (Enemy, PLAYER_BASE_DAMAGE, PLAYER_DAMAGE_SPREAD,
+                    ENEMY_MIN_DAMAGE, ENEMY_MAX_DAMAGE, MIN_DAMAGE_TAKEN)
+from item import item_registry
+from worldgen import new_seed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fights are simulated one at a time in pure Python instead
+
+BATCH_SIZE = 250_000  # Fights simulated together (and handed to one worker process)
+MAX_TURNS = 500       # Fights still undecided after this many rounds count as timeouts
+PLAYER_MAX_HEALTH = 100
+POTION_THRESHOLD = 40  # Drink a potion instead of attacking at or below this health
+
+class Loadout:
+    # What the player brings into the fight, and when they drink potions
+    def __init__(self, weapon: Optional[str] = "Iron Sword", armor: Optional[str] = None, potions: int = 0,
+                 potion_threshold: int = POTION_THRESHOLD, health: int = PLAYER_MAX_HEALTH):
+        self.weapon = weapon
+        self.armor = armor
+        self.potions = potions
+        self.potion_threshold = potion_threshold
+        self.health = health
+        # Item names are looked up once, so a typo fails here rather than mid-simulation
+        self.weapon_definition = self._definition(weapon, "weapon")
+        self.armor_definition = self._definition(armor, "armor")
+
+    @staticmethod
+    def _definition(name: Optional[str], item_type: str):
+        if not name:
+            return None
+        definition = item_registry.find(name)
+        if definition is None or definition.item_type != item_type:
+            raise ValueError(f"Unknown {item_type}: {name!r}")
+        return definition
+
+    @property
+    def attack_damage(self) -> int:
+        # Centre of the attack damage range, as in CombatSystem.player_attack
+        return PLAYER_BASE_DAMAGE + (self.weapon_definition.damage_bonus if self.weapon_definition else 0)
+
+    @property
+    def defense(self) -> int:
+        return self.armor_definition.defense if self.armor_definition else 0
+
+    @property
+    def potion_heal(self) -> int:
+        return item_registry.get("health_potion").heal
+
+    def __repr__(self) -> str:
+        return (f"Loadout(weapon={self.weapon!r}, armor={self.armor!r}, potions={self.potions}, "
+                f"potion_threshold={self.potion_threshold})")
+
+class CombatStats:
+    # Aggregated outcome of many fights, kept as histograms so batches from any worker can be merged
+    def __init__(self, max_turns: int = MAX_TURNS, max_health: int = PLAYER_MAX_HEALTH, potions: int = 0):
+        self.fights = 0
+        self.wins = 0
+        self.losses = 0
+        self.timeouts = 0
+        self.turns_to_kill = [0] * (max_turns + 1)   # Wins by the round the enemy fell
+        self.hp_remaining = [0] * (max_health + 1)   # Wins by the player's health at the end
+        self.potions_used = [0] * (potions + 1)      # All fights by potions drunk
+
+    def merge(self, other: "CombatStats") -> None:
+        self.fights += other.fights
+        self.wins += other.wins
+        self.losses += other.losses
+        self.timeouts += other.timeouts
+        for mine, theirs in ((self.turns_to_kill, other.turns_to_kill), (self.hp_remaining, other.hp_remaining),
+                             (self.potions_used, other.potions_used)):
+            for i, count in enumerate(theirs):
+                mine[i] += count
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.fights if self.fights else 0.0
+
+    @staticmethod
+    def _mean(histogram: List[int]) -> float:
+        total = sum(histogram)
+        return sum(value * count for value, count in enumerate(histogram)) / total if total else 0.0
+
+    @staticmethod
+    def _percentile(histogram: List[int], fraction: float) -> int:
+        total = sum(histogram)
+        if not total:
+            return 0
+        target = fraction * total
+        seen = 0
+        for value, count in enumerate(histogram):
+            seen += count
+            if seen >= target:
+                return value
+        return len(histogram) - 1
+
+    def report(self) -> Dict[str, float]:
+        return {
+            'fights': self.fights,
+            'win_rate': self.win_rate,
+            'loss_rate': self.losses / self.fights if self.fights else 0.0,
+            'timeout_rate': self.timeouts / self.fights if self.fights else 0.0,
+            'turns_mean': self._mean(self.turns_to_kill),
+            'turns_p10': self._percentile(self.turns_to_kill, 0.1),
+            'turns_median': self._percentile(self.turns_to_kill, 0.5),
+            'turns_p90': self._percentile(self.turns_to_kill, 0.9),
+            'potions_mean': self._mean(self.potions_used),
+            'hp_remaining_mean': self._mean(self.hp_remaining),
+            'hp_remaining_p10': self._percentile(self.hp_remaining, 0.1),
+            'hp_remaining_median': self._percentile(self.hp_remaining, 0.5),
+        }
+
+    def summary(self) -> str:
+        report = self.report()
+        return (f"{report['fights']} fights: {report['win_rate']:.2%} won, {report['loss_rate']:.2%} lost, "
+                f"{report['timeout_rate']:.2%} timed out\n"
+                f"  rounds to kill: mean {report['turns_mean']:.1f}, p10 {report['turns_p10']}, "
+                f"median {report['turns_median']}, p90 {report['turns_p90']}\n"
+                f"  potions drunk: mean {report['potions_mean']:.2f}\n"
+                f"  HP left on a win: mean {report['hp_remaining_mean']:.1f}, p10 {report['hp_remaining_p10']}, "
+                f"median {report['hp_remaining_median']}")
+
+def _simulate_numpy(fights: int, loadout: Loadout, enemy: Enemy, max_turns: int, seed) -> CombatStats:
+    # Run every fight in the batch at once: each round is a handful of array operations over the
+    # fights still going, and finished fights are dropped from the arrays as soon as they end
+    rng = np.random.default_rng(seed)
+    stats = CombatStats(max_turns, loadout.health, loadout.potions)
+    turns_to_kill = np.zeros(max_turns + 1, np.int64)
+    hp_remaining = np.zeros(loadout.health + 1, np.int64)
+    potions_used = np.zeros(loadout.potions + 1, np.int64)
+
+    player_hp = np.full(fights, loadout.health, np.int32)
+    enemy_hp = np.full(fights, enemy.health, np.int32)
+    potions = np.full(fights, loadout.potions, np.int32)
+    low = loadout.attack_damage - PLAYER_DAMAGE_SPREAD
+    high = loadout.attack_damage + PLAYER_DAMAGE_SPREAD + 1
+    defense = loadout.defense
+
+    for turn in range(1, max_turns + 1):
+        if not player_hp.size:
+            break
+        # Player turn: drink a potion when low, otherwise attack
+        if loadout.potions:
+            drink = (potions > 0) & (player_hp <= loadout.potion_threshold) & (player_hp < loadout.health)
+            player_hp = np.where(drink, np.minimum(player_hp + loadout.potion_heal, loadout.health), player_hp)
+            potions -= drink
+            enemy_hp -= rng.integers(low, high, player_hp.size, dtype=np.int32) * ~drink
+        else:
+            enemy_hp -= rng.integers(low, high, player_hp.size, dtype=np.int32)
+        won = enemy_hp <= 0
+        if won.any():
+            turns_to_kill[turn] += np.count_nonzero(won)
+            hp_remaining += np.bincount(player_hp[won], minlength=loadout.health + 1)
+            potions_used += np.bincount(loadout.potions - potions[won], minlength=loadout.potions + 1)
+            alive = ~won
+            player_hp, enemy_hp, potions = player_hp[alive], enemy_hp[alive], potions[alive]
+
+        # Enemy turn
+        hits = rng.integers(ENEMY_MIN_DAMAGE, ENEMY_MAX_DAMAGE + 1, player_hp.size, dtype=np.int32) - defense
+        player_hp -= np.maximum(hits, MIN_DAMAGE_TAKEN)
+        lost = player_hp <= 0
+        if lost.any():
+            stats.losses += int(np.count_nonzero(lost))
+            potions_used += np.bincount(loadout.potions - potions[lost], minlength=loadout.potions + 1)
+            alive = ~lost
+            player_hp, enemy_hp, potions = player_hp[alive], enemy_hp[alive], potions[alive]
+
+    stats.timeouts = int(player_hp.size)
+    potions_used += np.bincount(loadout.potions - potions, minlength=loadout.potions + 1)
+    stats.fights = fights
+    stats.wins = int(turns_to_kill.sum())
+    stats.turns_to_kill = turns_to_kill.tolist()
+    stats.hp_remaining = hp_remaining.tolist()
+    stats.potions_used = potions_used.tolist()
+    return stats
+
+def _simulate_python(fights: int, loadout: Loadout, enemy: Enemy, max_turns: int, seed) -> CombatStats:
+    # Same rules as _simulate_numpy, one fight at a time (used when numpy isn't installed)
+    rng = random.Random(str(seed))
+    randint = rng.randint
+    stats = CombatStats(max_turns, loadout.health, loadout.potions)
+    low = loadout.attack_damage - PLAYER_DAMAGE_SPREAD
+    high = loadout.attack_damage + PLAYER_DAMAGE_SPREAD
+    defense = loadout.defense
+    potion_heal = loadout.potion_heal
+    for _ in range(fights):
+        player_hp = loadout.health
+        enemy_hp = enemy.health
+        potions = loadout.potions
+        for turn in range(1, max_turns + 1):
+            if potions and player_hp <= loadout.potion_threshold and player_hp < loadout.health:
+                player_hp = min(player_hp + potion_heal, loadout.health)
+                potions -= 1
+            else:
+                enemy_hp -= randint(low, high)
+                if enemy_hp <= 0:
+                    stats.wins += 1
+                    stats.turns_to_kill[turn] += 1
+                    stats.hp_remaining[player_hp] += 1
+                    break
+            player_hp -= max(MIN_DAMAGE_TAKEN, randint(ENEMY_MIN_DAMAGE, ENEMY_MAX_DAMAGE) - defense)
+            if player_hp <= 0:
+                stats.losses += 1
+                break
+        else:
+            stats.timeouts += 1
+        stats.potions_used[loadout.potions - potions] += 1
+    stats.fights = fights
+    return stats
+
+def _run_batch(fights: int, loadout: Loadout, enemy: Enemy, max_turns: int, seed: int, batch: int) -> CombatStats:
+    # Each batch draws from its own stream, so results don't depend on how batches are spread over workers
+    if np is not None:
+        return _simulate_numpy(fights, loadout, enemy, max_turns, [seed, batch])
+    return _simulate_python(fights, loadout, enemy, max_turns, f"{seed}:{batch}")
+
+def simulate_fights(loadout: Loadout, enemy: Enemy, fights: int, seed: Optional[int] = None, workers: int = 1,
+                    batch_size: int = BATCH_SIZE, max_turns: int = MAX_TURNS) -> CombatStats:
+    # Run fights between loadout and enemy, split into batches spread over worker processes when workers > 1
+    # The same seed always gives the same stats
+    if seed is None:
+        seed = new_seed()
+    batches = [(min(batch_size, fights - start), loadout, enemy, max_turns, seed, i)
+               for i, start in enumerate(range(0, fights, batch_size))]
+    stats = CombatStats(max_turns, loadout.health, loadout.potions)
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(_run_batch, *zip(*batches)):
+                stats.merge(result)
+    else:
+        for batch in batches:
+            stats.merge(_run_batch(*batch))
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate many boss fights for a loadout")
+    parser.add_argument("--fights", type=int, default=1_000_000)
+    parser.add_argument("--no-weapon", action="store_true")
+    parser.add_argument("--armor", choices=sorted(definition.name for definition in item_registry.definitions.values()
+                                                  if definition.item_type == "armor"))
+    parser.add_argument("--potions", type=int, default=0)
+    parser.add_argument("--potion-threshold", type=int, default=POTION_THRESHOLD)
+    parser.add_argument("--enemy-health", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    loadout = Loadout(weapon=None if args.no_weapon else "Iron Sword", armor=args.armor,
+                      potions=args.potions, potion_threshold=args.potion_threshold)
+    enemy = Enemy("Dungeon Boss", args.enemy_health, args.enemy_health)
+    start = time.perf_counter()
+    stats = simulate_fights(loadout, enemy, args.fights, seed=args.seed, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{loadout} vs {enemy.name} ({enemy.health} HP), {'numpy' if np is not None else 'pure Python'}, "
+          f"{elapsed:.2f}s")
+    print(stats.summary())
@@ -0,0 +1,311 @@
+import random
+from array import array
+from typing import Dict, List, Optional
+from collision import CollisionGrid
+from pathfinding import DistanceField, DIRECTIONS, NO_DIRECTION
+from assets import get_image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Systems fall back to per-actor loops over array.array columns
+
+# Entity kinds (0 marks a free slot)
+KIND_NPC = 1
+KIND_ENEMY = 2
+KIND_PICKUP = 3
+# AI behaviours
+AI_IDLE = 0
+AI_WANDER = 1  # Walk in a straight line, turning at random and when blocked
+AI_CHASE = 2   # Follow a shared flow field towards its target (usually the player)
+
+DEFAULT_CAPACITY = 1024
+WANDER_TURN_CHANCE = 0.02  # Chance per tick that a wandering actor picks a new direction
+
+# Component columns: name -> array typecode
+COLUMNS = {
+    'kind': 'B',
+    'ai': 'B',
+    'sprite': 'H',
+    'x': 'f',
+    'y': 'f',
+    'vx': 'f',
+    'vy': 'f',
+    'speed': 'f',
+    'width': 'H',
+    'height': 'H',
+    'health': 'i',
+    'max_health': 'i',
+    'attack': 'i',
+}
+NUMPY_TYPES = {'B': 'uint8', 'H': 'uint16', 'f': 'float32', 'i': 'int32'}
+
+class EntityStore:
+    # Actors stored as parallel typed columns indexed by slot: one array per component instead of one object per actor
+    # Systems (ai_system, movement_system, damage) update every live actor in a few array operations
+    # Actors must be no larger than a tile, and move less than a tile per tick
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, tile_size: int = 64, seed: Optional[int] = None):
+        self.tile_size = tile_size
+        self.capacity = 0
+        self.count = 0   # Live actors
+        self.free = []   # Free slots, lowest on top
+        self.sprites = []  # Sprite filenames, indexed by the sprite column
+        self.sprite_ids: Dict[str, int] = {}
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed) if np is not None else None
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, np.zeros(0, NUMPY_TYPES[typecode]) if np is not None else array(typecode))
+        self._grow(capacity)
+
+    def _grow(self, capacity: int) -> None:
+        # Enlarge every column to capacity slots
+        extra = capacity - self.capacity
+        for name, typecode in COLUMNS.items():
+            column = getattr(self, name)
+            if np is not None:
+                setattr(self, name, np.concatenate((column, np.zeros(extra, NUMPY_TYPES[typecode]))))
+            else:
+                column.extend(array(typecode, [0]) * extra)
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.free.sort(reverse=True)
+        self.capacity = capacity
+
+    def sprite_id(self, filename: str) -> int:
+        sprite = self.sprite_ids.get(filename)
+        if sprite is None:
+            sprite = self.sprite_ids[filename] = len(self.sprites)
+            self.sprites.append(filename)
+        return sprite
+
+    def spawn(self, kind: int, x: float, y: float, width: int = 40, height: int = 40, health: int = 1,
+              sprite: Optional[str] = None, speed: float = 0.0, ai: int = AI_IDLE, attack: int = 0) -> int:
+        # Add an actor and return its slot
+        if width > self.tile_size or height > self.tile_size:
+            raise ValueError("Actors can't be larger than a tile")
+        if not self.free:
+            self._grow(max(self.capacity * 2, DEFAULT_CAPACITY))
+        slot = self.free.pop()
+        self.kind[slot] = kind
+        self.ai[slot] = ai
+        self.sprite[slot] = self.sprite_id(sprite) if sprite else 0xFFFF
+        self.x[slot] = x
+        self.y[slot] = y
+        self.vx[slot] = 0
+        self.vy[slot] = 0
+        self.speed[slot] = speed
+        self.width[slot] = width
+        self.height[slot] = height
+        self.health[slot] = health
+        self.max_health[slot] = health
+        self.attack[slot] = attack
+        self.count += 1
+        return slot
+
+    def despawn(self, slot: int) -> None:
+        if self.kind[slot]:
+            self.kind[slot] = 0
+            self.free.append(slot)
+            self.count -= 1
+
+    def clear(self) -> None:
+        for slot in self.live_slots():
+            self.despawn(int(slot))
+
+    def live_slots(self):
+        # Slots of every live actor (a numpy index array, or a list without numpy)
+        if np is not None:
+            return np.flatnonzero(self.kind)
+        return [slot for slot, kind in enumerate(self.kind) if kind]
+
+    def in_rect(self, x: float, y: float, width: float, height: float, kind: Optional[int] = None):
+        # Slots of live actors overlapping the pixel rectangle (e.g. the screen), optionally of one kind
+        if np is not None:
+            mask = ((self.kind != 0) & (self.x < x + width) & (self.x + self.width > x)
+                    & (self.y < y + height) & (self.y + self.height > y))
+            if kind is not None:
+                mask &= self.kind == kind
+            return np.flatnonzero(mask)
+        return [slot for slot in self.live_slots()
+                if (kind is None or self.kind[slot] == kind)
+                and self.x[slot] < x + width and self.x[slot] + self.width[slot] > x
+                and self.y[slot] < y + height and self.y[slot] + self.height[slot] > y]
+
+    def damage(self, slots, amounts) -> List[int]:
+        # Apply damage to many actors at once (amounts is one value or one per slot); returns the slots that died
+        if np is not None:
+            slots = np.asarray(slots, dtype=np.intp)
+            np.subtract.at(self.health, slots, np.broadcast_to(np.asarray(amounts, dtype=np.int32), slots.shape))
+            np.maximum(self.health, 0, out=self.health)
+            killed = slots[(self.health[slots] == 0) & (self.kind[slots] != 0)]
+            return np.unique(killed).tolist()
+        if isinstance(amounts, int):
+            amounts = [amounts] * len(slots)
+        killed = []
+        for slot, amount in zip(slots, amounts):
+            self.health[slot] = max(0, self.health[slot] - amount)
+            if self.health[slot] == 0 and self.kind[slot] and slot not in killed:
+                killed.append(slot)
+        return killed
+
+    def damage_in_rect(self, x: float, y: float, width: float, height: float, amount: int,
+                       kind: Optional[int] = KIND_ENEMY) -> List[int]:
+        # Area attack: damage every actor of kind overlapping the rectangle and despawn the ones that die
+        killed = self.damage(self.in_rect(x, y, width, height, kind), amount)
+        for slot in killed:
+            self.despawn(slot)
+        return killed
+
+    def ai_system(self, chase_field: Optional[DistanceField] = None) -> None:
+        # Choose velocities: wanderers turn at random or when stopped, chasers steer for the next tile on the field
+        size = self.tile_size
+        if np is not None:
+            live = self.kind != 0
+            wander = np.flatnonzero(live & (self.ai == AI_WANDER))
+            if wander.size:
+                stopped = (self.vx[wander] == 0) & (self.vy[wander] == 0)
+                turning = wander[stopped | (self.np_rng.random(wander.size) < WANDER_TURN_CHANCE)]
+                if turning.size:
+                    choice = self.np_rng.integers(0, 4, turning.size)
+                    step_x = np.array([dx for dx, _ in DIRECTIONS], np.float32)
+                    step_y = np.array([dy for _, dy in DIRECTIONS], np.float32)
+                    self.vx[turning] = step_x[choice] * self.speed[turning]
+                    self.vy[turning] = step_y[choice] * self.speed[turning]
+            chase = np.flatnonzero(live & (self.ai == AI_CHASE))
+            if chase.size:
+                if chase_field is None:
+                    self.vx[chase] = 0
+                    self.vy[chase] = 0
+                    return
+                centre_x = self.x[chase] + self.width[chase] / 2
+                centre_y = self.y[chase] + self.height[chase] / 2
+                tile_x = np.clip((centre_x // size).astype(np.intp), 0, chase_field.width - 1)
+                tile_y = np.clip((centre_y // size).astype(np.intp), 0, chase_field.height - 1)
+                directions = np.frombuffer(chase_field.directions, dtype=np.uint8)[tile_y * chase_field.width + tile_x]
+                moving = directions != NO_DIRECTION
+                step = np.where(moving, directions, 0)
+                step_x = np.array([dx for dx, _ in DIRECTIONS], np.float32)[step]
+                step_y = np.array([dy for _, dy in DIRECTIONS], np.float32)[step]
+                # Head for the centre of the next tile so actors round corners instead of scraping walls
+                to_x = (tile_x + step_x + 0.5) * size - centre_x
+                to_y = (tile_y + step_y + 0.5) * size - centre_y
+                length = np.hypot(to_x, to_y)
+                length[length == 0] = 1
+                scale = np.where(moving, self.speed[chase] / length, 0)
+                self.vx[chase] = to_x * scale
+                self.vy[chase] = to_y * scale
+            return
+
+        for slot in self.live_slots():
+            speed = self.speed[slot]
+            if self.ai[slot] == AI_WANDER:
+                if (self.vx[slot] == 0 and self.vy[slot] == 0) or self.rng.random() < WANDER_TURN_CHANCE:
+                    dx, dy = DIRECTIONS[self.rng.randrange(4)]
+                    self.vx[slot] = dx * speed
+                    self.vy[slot] = dy * speed
+            elif self.ai[slot] == AI_CHASE:
+                self.vx[slot] = 0
+                self.vy[slot] = 0
+                if chase_field is None:
+                    continue
+                centre_x = self.x[slot] + self.width[slot] / 2
+                centre_y = self.y[slot] + self.height[slot] / 2
+                tile_x = int(centre_x // size)
+                tile_y = int(centre_y // size)
+                step = chase_field.next_step(tile_x, tile_y)
+                if step is None:
+                    continue
+                to_x = (step[0] + 0.5) * size - centre_x
+                to_y = (step[1] + 0.5) * size - centre_y
+                length = (to_x * to_x + to_y * to_y) ** 0.5 or 1
+                self.vx[slot] = to_x * speed / length
+                self.vy[slot] = to_y * speed / length
+
+    def movement_system(self, grid: CollisionGrid, dt: float) -> None:
+        # Move every actor by its velocity, one axis at a time, stopping flush against walls in the tile bitmap
+        # Actors that hit a wall lose their velocity on that axis
+        size = self.tile_size
+        if np is not None:
+            moving = np.flatnonzero((self.kind != 0) & ((self.vx != 0) | (self.vy != 0)))
+            if not moving.size:
+                return
+            solid = np.frombuffer(grid.solid, dtype=np.uint8)
+            width = grid.width
+            height = grid.height
+
+            def blocked(tile_x, tile_y):
+                # Solid test for arrays of tile coordinates (outside the map counts as solid)
+                inside = (tile_x >= 0) & (tile_y >= 0) & (tile_x < width) & (tile_y < height)
+                index = np.where(inside, tile_y * width + tile_x, 0)
+                return ~inside | (solid[index] == 1)
+
+            x = self.x[moving]
+            y = self.y[moving]
+            vx = self.vx[moving]
+            vy = self.vy[moving]
+            w = self.width[moving].astype(np.float32)
+            h = self.height[moving].astype(np.float32)
+
+            # Horizontal: test the leading edge at the actor's top and bottom rows
+            new_x = x + vx * dt
+            edge = np.where(vx > 0, new_x + w - 1, new_x)
+            column = np.floor(edge / size).astype(np.intp)
+            top = np.floor(y / size).astype(np.intp)
+            bottom = np.floor((y + h - 1) / size).astype(np.intp)
+            hit = (vx != 0) & (blocked(column, top) | blocked(column, bottom))
+            new_x = np.where(hit, np.where(vx > 0, column * size - w, (column + 1) * size), new_x)
+            vx = np.where(hit, 0, vx)
+
+            # Vertical, from the new horizontal position
+            new_y = y + vy * dt
+            edge = np.where(vy > 0, new_y + h - 1, new_y)
+            row = np.floor(edge / size).astype(np.intp)
+            left = np.floor(new_x / size).astype(np.intp)
+            right = np.floor((new_x + w - 1) / size).astype(np.intp)
+            hit = (vy != 0) & (blocked(left, row) | blocked(right, row))
+            new_y = np.where(hit, np.where(vy > 0, row * size - h, (row + 1) * size), new_y)
+            vy = np.where(hit, 0, vy)
+
+            self.x[moving] = new_x
+            self.y[moving] = new_y
+            self.vx[moving] = vx
+            self.vy[moving] = vy
+            return
+
+        for slot in self.live_slots():
+            vx = self.vx[slot]
+            vy = self.vy[slot]
+            if vx == 0 and vy == 0:
+                continue
+            w = self.width[slot]
+            h = self.height[slot]
+            # sweep_x/sweep_y test every tile the box crosses on the way, while the vectorised path only tests the
+            # destination column/row at the box's two corner rows/columns, so an actor moving more than a tile per
+            # tick, or taller/wider than a tile, can stop somewhere else here than with numpy
+            x = grid.sweep_x(self.x[slot], int(self.y[slot]), w, h, vx * dt)
+            if x != self.x[slot] + vx * dt:
+                self.vx[slot] = 0
+            y = grid.sweep_y(int(x), self.y[slot], w, h, vy * dt)
+            if y != self.y[slot] + vy * dt:
+                self.vy[slot] = 0
+            self.x[slot] = x
+            self.y[slot] = y
+
+    def update(self, grid: CollisionGrid, dt: float, chase_field: Optional[DistanceField] = None) -> None:
+        # One simulation tick for every actor
+        if not self.count:
+            return
+        self.ai_system(chase_field)
+        self.movement_system(grid, dt)
+
+    def draw(self, screen, camera_x: float, camera_y: float, view_width: int, view_height: int) -> None:
+        # Blit the actors overlapping the view
+        for slot in self.in_rect(camera_x, camera_y, view_width, view_height):
+            sprite = self.sprite[slot]
+            if sprite == 0xFFFF:
+                continue
+            size = (int(self.width[slot]), int(self.height[slot]))
+            try:
+                image = get_image(self.sprites[sprite], size)
+            except FileNotFoundError:
+                continue
+            screen.blit(image, (float(self.x[slot]) - camera_x, float(self.y[slot]) - camera_y))
@@ -0,0 +1,47 @@
+import pygame
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+MAX_CACHED_TEXT = 512  # Rendered text surfaces kept before the least recently used is dropped
+
+# Fonts keyed by (family, size, bold); SysFont scans the system fonts so it only runs once per key
+_fonts: Dict[Tuple[str, int, bool], pygame.font.Font] = {}
+# Rendered text keyed by (font, text, colour), least recently used first
+_text_cache = OrderedDict()
+
+stats = {
+    'font_loads': 0,
+    'text_hits': 0,
+    'text_renders': 0,
+}
+
+def get_font(family: str, size: int, bold: bool = False) -> pygame.font.Font:
+    # Return the shared Font for (family, size, bold), creating it on first use
+    key = (family, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(family, size, bold=bold)
+        _fonts[key] = font
+        stats['font_loads'] += 1
+    return font
+
+def render_text(font: pygame.font.Font, text: str, colour) -> pygame.Surface:
+    # Return an antialiased Surface for text, re-rendering only text that has not been seen recently
+    # The Surface is shared, so callers must only blit it and never draw onto it
+    key = (font, text, tuple(colour))
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        stats['text_hits'] += 1
+        return surface
+    surface = font.render(text, True, colour)
+    _text_cache[key] = surface
+    stats['text_renders'] += 1
+    if len(_text_cache) > MAX_CACHED_TEXT:
+        _text_cache.popitem(last=False)
+    return surface
+
+def clear_text_cache() -> None:
+    _text_cache.clear()
@@ -0,0 +1,294 @@
+import time
+import pygame
+from typing import Callable, Iterable, Optional
+from player import Player
+from npc import NPC
+from map import GameMap, TILE_SIZE
+from map_validator import SPAWN_TILE
+from item import create_health_potion, create_sword, create_key
+from combat import CombatSystem, Enemy
+from puzzle import MathPuzzle
+from spatial import SpatialHash
+from entities import EntityStore
+from game_loop import SIM_RATE  # Timers below count ticks at this rate
+
+REGENERATION_MESSAGE_TICKS = 180  # Show the new map message for 3 seconds
+NOTICE_TICKS = 120  # Status messages stay up for 2 seconds
+ENDING_DURATION = 180  # 3 seconds at 60 ticks per second
+PLAYER_START = (SPAWN_TILE[0] * TILE_SIZE, SPAWN_TILE[1] * TILE_SIZE)  # Every map keeps the spawn tile open
+NPC_START = (320, 320)
+NPC_DIALOGUE = "Welcome to the Random Dungeon! Explore the maze, find chests, defeat the boss, and reach the final goal! Press Ctrl+R to generate a new map."
+
+class KeyState:
+    # Keys held during one tick, indexable like pygame.key.get_pressed() so scripts can drive the core
+    def __init__(self, held: Iterable[int] = ()):
+        self.held = set(held)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.held
+
+class GameCore:
+    # The game rules without a display: movement, collision, chests and puzzles, inventory and combat
+    # A front end (main.py, or a script) calls step() once per tick with the held keys, sends one-off
+    # commands (puzzle answers, combat actions, regeneration) through the methods below and draws the state
+    def __init__(self, seed: Optional[int] = None, verbose: bool = True):
+        self.verbose = verbose  # Print map and debug messages
+        # This game's map, chests and everything derived from them (a random map unless seed is given)
+        self.map = GameMap(seed=seed, verbose=verbose)
+
+        self.player = Player(*PLAYER_START, self.map.collision_grid)
+        # NPCs and other world entities, bucketed by position for interaction and on-screen queries
+        self.entities = SpatialHash()
+        self.npc = NPC(*NPC_START, NPC_DIALOGUE)
+        self.add_entity(self.npc)
+        # Large populations of roaming actors (enemies, pickups) live in a column store updated in batches
+        self.actors = EntityStore(tile_size=TILE_SIZE)
+        # Starting items
+        self.player.add_item(create_health_potion())
+        self.player.add_item(create_sword())
+        self.player.add_item(create_key())
+
+        # Messages shown in the textbox
+        self.dialogue_message = ""
+        self.npc_message_active = False
+        self.space_was_pressed = False
+        self.chest_message = ""
+        self.chest_message_active = False
+        self.last_e_state = False
+        self.map_regenerated = False
+        self.regeneration_timer = 0
+        self.notice = ""  # Short status message such as "Game saved"
+        self.notice_timer = 0
+
+        # Chest puzzle and boss combat
+        self.puzzle_active = False
+        self.current_puzzle = None
+        self.combat_system = None
+
+        # Ending screen; finished is set once the player leaves it
+        self.ending_screen = False
+        self.ending_timer = 0
+        self.finished = False
+        self.ticks = 0
+
+    def add_entity(self, entity) -> None:
+        # Entities that move afterwards must be passed to move_entity
+        self.entities.insert(entity)
+
+    def remove_entity(self, entity) -> None:
+        self.entities.remove(entity)
+
+    def move_entity(self, entity) -> None:
+        # Re-file an entity after its rect changed
+        self.entities.update(entity)
+
+    def visible_entities(self, x: float, y: float, width: int, height: int):
+        # Entities overlapping the view rectangle, back to front
+        return self.entities.query_rect(int(x), int(y), width, height)
+
+    def notify(self, text: str, ticks: int = NOTICE_TICKS) -> None:
+        # Show a status message in the textbox for a while
+        self.notice = text
+        self.notice_timer = ticks
+
+    def log(self, text: str) -> None:
+        if self.verbose:
+            print(text)
+
+    def regenerate(self, seed: Optional[int] = None) -> None:
+        # Switch to a new map (or the map for seed) and put the player back at a valid start
+        self.map.regenerate(seed=seed, verbose=self.verbose)
+
+        # Generated maps are validated, so the spawn tile is always open and connected
+        start_x, start_y = PLAYER_START
+        if self.verbose:
+            print("Testing collision at starting position...")
+            self.map.debug_collision(start_x, start_y)
+
+        # Reset player position to the spawn
+        self.player.rect.x = start_x
+        self.player.rect.y = start_y
+        # Roaming actors belonged to the old map
+        self.actors.clear()
+
+        # Show regeneration message
+        self.map_regenerated = True
+        self.regeneration_timer = REGENERATION_MESSAGE_TICKS
+
+    def submit_puzzle(self, answer: Optional[str] = None) -> bool:
+        # Check the chest puzzle (optionally typing answer first) and hand out the loot; returns True if it was right
+        if not self.puzzle_active or self.current_puzzle is None:
+            return False
+        if answer is not None:
+            self.current_puzzle.user_answer = answer
+        correct = self.current_puzzle.check_answer()
+        if correct:
+            # Correct answer
+            player_x, player_y = self.player.rect.centerx // 64, self.player.rect.centery // 64
+            item = self.map.get_chest_loot(player_x, player_y)
+            success, msg = self.player.add_item(item)
+            if success:
+                self.chest_message = f"Correct! You found {item.name}!"
+            else:
+                self.chest_message = f"Correct! But your inventory is full."
+            self.map.mark_chest_opened(player_x, player_y)
+        else:
+            # Incorrect answer
+            self.chest_message = "Incorrect answer. The chest remains locked."
+        self.puzzle_active = False
+        self.current_puzzle = None
+        self.chest_message_active = True
+        return correct
+
+    def combat_action(self, action: str, item_index: Optional[int] = None) -> None:
+        # Player's combat choice: "attack", "item" (with item_index) or "run"
+        combat_system = self.combat_system
+        if combat_system is None or not combat_system.combat_active or not combat_system.is_player_turn:
+            return
+        if action == "run":
+            self.combat_system = None
+            self.player.rect.x -= 64  # Move player away from boss
+        else:
+            # The enemy's reply is scheduled and runs from combat_system.update
+            combat_system.process_turn(action, item_index)
+
+    def step(self, keys, dt: float) -> None:
+        # Advance the game by one simulation tick of dt seconds with the given held keys
+        self.ticks += 1
+        player = self.player
+
+        # The ending screen freezes the game until the player leaves
+        if self.ending_screen:
+            self.ending_timer += 1
+            if keys[pygame.K_SPACE] and self.ending_timer > 60:
+                self.finished = True
+            return
+
+        # Movement (swept against the collision grid, so the player can't end up inside a wall)
+        player.move(keys, dt)
+
+        # Roaming actors: chasers share one flow field towards the player's tile
+        if self.actors.count:
+            chase_field = self.map.pathfinder.field_to((player.rect.centerx // TILE_SIZE, player.rect.centery // TILE_SIZE))
+            self.actors.update(self.map.collision_grid, dt, chase_field)
+
+        # Toggle NPC message on space press (not hold)
+        if keys[pygame.K_SPACE] and not self.space_was_pressed:
+            if not self.npc_message_active:
+                # Only the entities touching the player are asked
+                for npc in self.entities.colliding(player.rect):
+                    npc_message = npc.interact(player.rect)
+                    if npc_message:
+                        self.dialogue_message = npc_message
+                        self.npc_message_active = True
+                        break
+            else:
+                self.dialogue_message = ""
+                self.npc_message_active = False
+        self.space_was_pressed = keys[pygame.K_SPACE]
+
+        # Check tile under player and set message
+        tile_under_player = self.map.get_tile(player.rect.centerx, player.rect.centery)
+        e_pressed = keys[pygame.K_e] and not self.last_e_state
+
+        if tile_under_player == 2:  # Chest
+            player_x, player_y = player.rect.centerx // 64, player.rect.centery // 64
+
+            if not self.chest_message_active:
+                if self.map.is_chest_opened(player_x, player_y):
+                    self.chest_message = "This chest has already been opened."
+                    self.chest_message_active = True
+                else:
+                    self.chest_message = "You found a chest! Press E to open it!"
+                    if e_pressed:
+                        #- Trigger the math puzzle
+                        self.current_puzzle = MathPuzzle(rng=self.map.world.rng("puzzle", player_x, player_y))
+                        self.puzzle_active = True
+                        self.chest_message = ""
+                        self.chest_message_active = False
+        elif tile_under_player == 5:  # Boss
+            if self.combat_system is None:
+                # Initialize combat with a boss enemy
+                boss = Enemy("Dungeon Boss", 300, 300)
+                self.combat_system = CombatSystem(player, boss, rng=self.map.world.rng("combat"))
+                self.combat_system.start_combat()
+            combat_system = self.combat_system
+
+            # Handle victory screen
+            if combat_system.victory_screen:
+                if keys[pygame.K_SPACE] and combat_system.victory_timer > 60:  # 1 second delay
+                    self.combat_system = None  # Close combat system
+                    # Clear the defeated boss from the map
+                    self.map.set_tile(player.rect.centerx // 64, player.rect.centery // 64, 4)
+                    player.rect.x -= 64  # Move player away from boss
+                else:
+                    combat_system.victory_timer += 1
+                return  # Skip rest of the tick during victory screen
+
+            if combat_system.combat_active:
+                # Run the enemy turn once its attack delay has elapsed
+                combat_system.update(dt)
+            else:
+                # Combat is over, reset combat system
+                self.combat_system = None
+        else:
+            # Clear chest message when walking off chest
+            self.chest_message = ""
+            self.chest_message_active = False
+
+        # Update last E key state
+        self.last_e_state = keys[pygame.K_e]
+
+        # Count down the regeneration message while it is the one on screen
+        if not self.dialogue_message and not self.chest_message and self.map_regenerated and self.regeneration_timer > 0:
+            self.regeneration_timer -= 1
+            if self.regeneration_timer <= 0:
+                self.map_regenerated = False
+
+        if self.notice_timer > 0:
+            self.notice_timer -= 1
+
+        # Check tile under player and set message
+        tile_under_player = self.map.get_tile(player.rect.centerx, player.rect.centery)
+
+        if tile_under_player == 6:  # Goal
+            self.ending_screen = True
+            self.ending_timer = 0
+
+    def textbox_message(self) -> str:
+        # The message a front end should show in the textbox, if any
+        if self.dialogue_message:
+            return self.dialogue_message
+        if self.chest_message:
+            return self.chest_message
+        if self.map_regenerated and self.regeneration_timer > 0:
+            return f"New map generated! Explore the new dungeon! (Map ID {self.map.map_id})"
+        if self.notice_timer > 0:
+            return self.notice
+        return ""
+
+def simulate(ticks: int, script: Optional[Callable] = None, seed: Optional[int] = None,
+             dt: float = 1.0 / SIM_RATE, core: Optional[GameCore] = None) -> GameCore:
+    # Run a headless session for up to ticks simulation steps and return the final state
+    # script(core, tick) returns the keys held that tick (a KeyState or anything indexable by key code)
+    # and may call the command methods on core; without a script the player stands still
+    if core is None:
+        core = GameCore(seed=seed, verbose=False)
+    idle = KeyState()
+    for tick in range(ticks):
+        keys = script(core, tick) if script is not None else None
+        core.step(keys if keys is not None else idle, dt)
+        if core.finished:
+            break
+    return core
+
+if __name__ == "__main__":
+    # Benchmark: walk a scripted pattern through the current map without opening a window
+    def wander(core, tick):
+        return KeyState((pygame.K_d,) if tick % 120 < 60 else (pygame.K_s,))
+
+    start = time.perf_counter()
+    core = simulate(SIM_RATE * 60, wander)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {core.ticks} ticks in {elapsed:.3f}s ({core.ticks / elapsed:.0f} ticks/s), "
+          f"player at {core.player.rect.topleft}")
@@ -0,0 +1,69 @@
+import time
+import pygame
+from typing import Callable, Optional
+
+SIM_RATE = 60           # Simulation ticks per second
+MAX_FPS = 50            # Rendering frame rate cap (0 for uncapped)
+MAX_CATCHUP_STEPS = 5   # Simulation ticks allowed per rendered frame before dropping time
+MAX_FRAME_TIME = 0.25   # Longest frame (seconds) fed into the simulation
+
+class GameLoop:
+    # Fixed-timestep loop: the simulation advances in constant ticks of 1 / sim_rate seconds,
+    # while rendering runs at its own rate and interpolates between the last two ticks
+    #   handle_events()  once per frame, before simulating
+    #   update(dt)       once per simulation tick, dt is always 1 / sim_rate
+    #   render(alpha)    once per frame, alpha in [0, 1) is how far we are towards the next tick
+    def __init__(self, update: Callable[[float], None], render: Callable[[float], None],
+                 handle_events: Optional[Callable[[], None]] = None, sim_rate: int = SIM_RATE,
+                 max_fps: int = MAX_FPS, max_catchup_steps: int = MAX_CATCHUP_STEPS,
+                 max_frame_time: float = MAX_FRAME_TIME):
+        self.update = update
+        self.render = render
+        self.handle_events = handle_events
+        self.sim_rate = sim_rate
+        self.dt = 1.0 / sim_rate
+        self.max_fps = max_fps
+        self.max_catchup_steps = max_catchup_steps
+        self.max_frame_time = max_frame_time
+        self.running = False
+        self.clock = pygame.time.Clock()
+        self.ticks = 0          # Simulation ticks run so far
+        self.frames = 0         # Frames rendered so far
+        self.dropped_time = 0.0 # Seconds of simulation skipped because the catch-up budget ran out
+
+    def stop(self) -> None:
+        self.running = False
+
+    def step(self, frame_time: float, accumulator: float) -> float:
+        # Run the simulation ticks owed for one frame and return the leftover time
+        accumulator += min(frame_time, self.max_frame_time)
+        steps = 0
+        while accumulator >= self.dt and self.running:
+            if steps >= self.max_catchup_steps:
+                # Too far behind: drop the backlog instead of spiralling
+                self.dropped_time += accumulator - accumulator % self.dt
+                accumulator %= self.dt
+                break
+            self.update(self.dt)
+            self.ticks += 1
+            accumulator -= self.dt
+            steps += 1
+        return accumulator
+
+    def run(self) -> None:
+        self.running = True
+        accumulator = 0.0
+        previous = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            frame_time = now - previous
+            previous = now
+            if self.handle_events is not None:
+                self.handle_events()
+            accumulator = self.step(frame_time, accumulator)
+            if not self.running:
+                break
+            self.render(accumulator / self.dt)
+            self.frames += 1
+            if self.max_fps:
+                self.clock.tick(self.max_fps)
@@ -1,10 +1,12 @@
 import pygame
-from item import Item
+from item import Item, item_registry
+from fonts import get_font, render_text
+import overlays
 
 class Inventory:
     def __init__(self, max_slots=20):
         self.max_slots = max_slots
-        self.items = []
+        self.items = []  # Also builds the name index (see _reindex)
         self.selected_slot = 0
         self.is_open = False
         
@@ -26,36 +28,121 @@ class Inventory:
         self.equipment_slot_size = 80  # Increased from 64
         self.equipment_x = self.inventory_x + (self.slots_per_row * (self.slot_size + self.padding)) + 50
 
+        # Called as listener(operation, *arguments) for every change, e.g. by the autosave journal
+        self.listener = None
+
+    @property
+    def items(self):
+        return self._items
+
+    @items.setter
+    def items(self, items):
+        # Replacing the whole list (e.g. loading a save) rebuilds the index
+        self._items = list(items)
+        self._reindex()
+
+    def _changed(self, operation, *arguments):
+        if self.listener is not None:
+            self.listener(operation, *arguments)
+
+    # Index of the bag by case-folded item name: the items under each name, their total quantity and
+    # the stacks that still have room (kept in insertion order, like a set)
+    # Every change to self.items goes through the helpers below, so lookups never scan the bag
+    def _reindex(self):
+        self.by_name = {}
+        self.counts = {}
+        self.open_stacks = {}
+        for item in self._items:
+            self._index_add(item)
+
+    def _index_add(self, item):
+        key = item.name.casefold()
+        self.by_name.setdefault(key, []).append(item)
+        self.counts[key] = self.counts.get(key, 0) + item.quantity
+        self._update_open(key, item)
+
+    def _update_open(self, key, item):
+        # File a stack under open_stacks while it has room, drop it once it is full or gone
+        if item.stackable and 0 < item.quantity < item.max_stack:
+            self.open_stacks.setdefault(key, {})[item] = None
+        else:
+            self._close_stack(key, item)
+
+    def _close_stack(self, key, item):
+        stacks = self.open_stacks.get(key)
+        if stacks is not None:
+            stacks.pop(item, None)
+            if not stacks:
+                del self.open_stacks[key]
+
+    def _append(self, item):
+        self._items.append(item)
+        self._index_add(item)
+
+    def _pop(self, slot_index):
+        item = self._items.pop(slot_index)
+        key = item.name.casefold()
+        entries = self.by_name[key]
+        entries.remove(item)
+        self._close_stack(key, item)
+        if entries:
+            self.counts[key] -= item.quantity
+        else:
+            del self.by_name[key]
+            del self.counts[key]
+        return item
+
     def add_item(self, item):
-        #Add an item to the inventory
-        if len(self.items) >= self.max_slots:
+        #Add an item to the inventory, topping up matching stacks before taking a new slot
+        key = item.name.casefold()
+        stacks = []
+        if item.stackable:
+            stacks = [stack for stack in self.open_stacks.get(key, ()) if stack.can_stack_with(item)]
+        room = sum(stack.max_stack - stack.quantity for stack in stacks)
+        if item.quantity > room and len(self._items) >= self.max_slots:
+            if stacks:
+                return False, f"Cannot add more {item.name} - stack is full"
             return False, "Inventory is full!"
-        
-        # Check if we can stack with existing items
-        for existing_item in self.items:
-            if existing_item.can_stack_with(item):
-                if existing_item.add_to_stack(item.quantity):
-                    return True, f"Added {item.quantity} {item.name} to stack"
-                else:
-                    return False, f"Cannot add more {item.name} - stack is full"
-        
-        # If we can't stack, add as new item
-        self.items.append(item)
+
+        # Reported before the stacks change, so the listener sees the item as it was handed in
+        self._changed("add", item)
+        amount = item.quantity
+        remaining = amount
+        for stack in stacks:
+            moved = min(remaining, stack.max_stack - stack.quantity)
+            stack.add_to_stack(moved)
+            self._update_open(key, stack)
+            remaining -= moved
+            if not remaining:
+                break
+        self.counts[key] = self.counts.get(key, 0) + amount - remaining
+        if not remaining:
+            return True, f"Added {amount} {item.name} to stack"
+
+        # What didn't fit in a stack takes a new slot
+        item.quantity = remaining
+        self._append(item)
         return True, f"Added {item.name} to inventory"
     
     def remove_item(self, slot_index, amount=1):
         #Remove an item from a specific slot
-        if 0 <= slot_index < len(self.items):
-            item = self.items[slot_index]
+        if 0 <= slot_index < len(self._items):
+            item = self._items[slot_index]
             if item.stackable:
                 if item.remove_from_stack(amount):
+                    key = item.name.casefold()
+                    self.counts[key] -= amount
                     if item.is_empty():
-                        self.items.pop(slot_index)
+                        self._pop(slot_index)
+                    else:
+                        self._update_open(key, item)
+                    self._changed("remove", slot_index, amount)
                     return True, f"Removed {amount} {item.name}"
                 else:
                     return False, f"Not enough {item.name} to remove"
             else:
-                self.items.pop(slot_index)
+                self._pop(slot_index)
+                self._changed("remove", slot_index, amount)
                 return True, f"Removed {item.name}"
         return False, "Invalid slot"
     
@@ -80,33 +167,34 @@ class Inventory:
     
     def has_item(self, item_name):
         #Check if inventory has a specific item
-        for item in self.items:
-            if item.name.lower() == item_name.lower():
-                return True
-        return False
+        return item_name.casefold() in self.by_name
     
     def get_item_count(self, item_name):
         #Get total count of a specific item
-        total = 0
-        for item in self.items:
-            if item.name.lower() == item_name.lower():
-                total += item.quantity
-        return total
+        return self.counts.get(item_name.casefold(), 0)
+
+    def find_items(self, item_name):
+        # Every item in the bag with this name (any case)
+        return list(self.by_name.get(item_name.casefold(), ()))
     
     def sort_by_type(self):
         #Sort items by type
         type_order = ["weapon", "armor", "consumable", "key"]
         self.items.sort(key=lambda x: (type_order.index(x.item_type) if x.item_type in type_order else len(type_order), x.name))
+        self._changed("sort_by_type")
     
     def sort_by_name(self):
         #Sort items alphabetically by name
         self.items.sort(key=lambda x: x.name.lower())
+        self._changed("sort_by_name")
     
 
     
     def clear(self):
         #Clear all items from inventory
-        self.items.clear()
+        self._items.clear()
+        self._reindex()
+        self._changed("clear")
     
 
     
@@ -122,11 +210,12 @@ class Inventory:
                 # Unequip current item if any
                 current_equipped = self.equipment[item.item_type]
                 if current_equipped:
-                    self.items.append(current_equipped)
+                    self._append(current_equipped)
                 
                 # Equip new item
                 self.equipment[item.item_type] = item
-                self.items.pop(slot_index)
+                self._pop(slot_index)
+                self._changed("equip", slot_index)
                 return True, f"Equipped {item.name}"
         return False, "Cannot equip this item"
 
@@ -135,8 +224,9 @@ class Inventory:
         if equipment_type in self.equipment and self.equipment[equipment_type]:
             item = self.equipment[equipment_type]
             if len(self.items) < self.max_slots:
-                self.items.append(item)
+                self._append(item)
                 self.equipment[equipment_type] = None
+                self._changed("unequip", equipment_type)
                 return True, f"Unequipped {item.name}"
             return False, "Inventory is full"
         return False, "No item equipped"
@@ -204,22 +294,12 @@ class Inventory:
         inventory_height = ((self.max_slots - 1) // self.slots_per_row + 1) * self.slot_size + ((self.max_slots - 1) // self.slots_per_row + 2) * self.padding + 100
         
         # Full screen overlay
-        overlay = pygame.Surface((1500, 1000))
-        overlay.set_alpha(128)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
-        
-        # Draw inventory background
-        pygame.draw.rect(screen, (50, 50, 50), 
-                        (self.inventory_x, self.inventory_y, inventory_width, inventory_height))
-        pygame.draw.rect(screen, (100, 100, 100), 
-                        (self.inventory_x, self.inventory_y, inventory_width, inventory_height), 3)
+        screen.blit(overlays.get_overlay(screen, 128), (0, 0))
         
-        # Draw title
-        font = pygame.font.SysFont("Arial", 24, bold=True)
-        title = font.render("INVENTORY", True, (255, 255, 255))
-        title_rect = title.get_rect(center=(self.inventory_x + inventory_width // 2, self.inventory_y + 20))
-        screen.blit(title, title_rect)
+        # Draw inventory background and title (built once)
+        screen.blit(overlays.get_panel("inventory", (inventory_width, inventory_height),
+                                       lambda panel: self.build_panel(panel, "INVENTORY")),
+                    (self.inventory_x, self.inventory_y))
         
         # Draw slots
         for i in range(self.max_slots):
@@ -241,8 +321,8 @@ class Inventory:
                 
                 # Draw quantity if stackable
                 if item.stackable and item.quantity > 1:
-                    font = pygame.font.SysFont("Arial", 12, bold=True)
-                    quantity_text = font.render(str(item.quantity), True, (255, 255, 255))
+                    font = get_font("Arial", 12, bold=True)
+                    quantity_text = render_text(font, str(item.quantity), (255, 255, 255))
                     screen.blit(quantity_text, (x + self.slot_size - 15, y + 5))
         
         # Draw item info
@@ -253,57 +333,58 @@ class Inventory:
         # Draw controls
         self.draw_controls(screen, self.inventory_x, self.inventory_y + inventory_height + 80)
         
-        # Draw equipment window
-        pygame.draw.rect(screen, (50, 50, 50), 
-                        (self.equipment_x, self.inventory_y, 
-                         self.equipment_width, inventory_height))
-        pygame.draw.rect(screen, (100, 100, 100), 
-                        (self.equipment_x, self.inventory_y, 
-                         self.equipment_width, inventory_height), 3)
-        
-        # Draw equipment title
-        font = pygame.font.SysFont("Arial", 24, bold=True)
-        title = font.render("EQUIPMENT", True, (255, 255, 255))
-        title_rect = title.get_rect(center=(self.equipment_x + self.equipment_width // 2, 
-                                          self.inventory_y + 20))
-        screen.blit(title, title_rect)
+        # Draw equipment window, title and controls hint (built once)
+        screen.blit(overlays.get_panel("equipment", (self.equipment_width, inventory_height),
+                                       lambda panel: self.build_panel(panel, "EQUIPMENT", "Press E to equip/Click to unequip")),
+                    (self.equipment_x, self.inventory_y))
         
         # Draw equipment slots
         self.draw_equipment_slot(screen, "weapon", self.equipment_x + 20, self.inventory_y + 100)
         self.draw_equipment_slot(screen, "armor", self.equipment_x + 20, self.inventory_y + 200)
+    
+    def build_panel(self, panel, title_text, hint_text=None):
+        # Static part of an inventory window: background, border, title and optional hint
+        width, height = panel.get_size()
+        panel.fill((50, 50, 50))
+        pygame.draw.rect(panel, (100, 100, 100), (0, 0, width, height), 3)
+        
+        font = get_font("Arial", 24, bold=True)
+        title = render_text(font, title_text, (255, 255, 255))
+        title_rect = title.get_rect(center=(width // 2, 20))
+        panel.blit(title, title_rect)
         
-        # Draw equipment controls hint
-        font = pygame.font.SysFont("Arial", 14)
-        hint = font.render("Press E to equip/Click to unequip", True, (150, 150, 150))
-        screen.blit(hint, (self.equipment_x + 10, self.inventory_y + inventory_height - 30))
+        if hint_text:
+            font = get_font("Arial", 14)
+            hint = render_text(font, hint_text, (150, 150, 150))
+            panel.blit(hint, (10, height - 30))
     
     def draw_item_info(self, screen, item, x, y):
         #Draw detailed information about the selected item
-        font = pygame.font.SysFont("Arial", 16)
-        title_font = pygame.font.SysFont("Arial", 18, bold=True)
+        font = get_font("Arial", 16)
+        title_font = get_font("Arial", 18, bold=True)
         
         # Item name
-        name_text = title_font.render(item.name, True, (255, 255, 255))
+        name_text = render_text(title_font, item.name, (255, 255, 255))
         screen.blit(name_text, (x, y))
         
         # Item description
-        desc_text = font.render(item.description, True, (200, 200, 200))
+        desc_text = render_text(font, item.description, (200, 200, 200))
         screen.blit(desc_text, (x, y + 25))
         
         # Item type
-        type_text = font.render(f"Type: {item.item_type.title()}", True, (180, 180, 180))
+        type_text = render_text(font, f"Type: {item.item_type.title()}", (180, 180, 180))
         screen.blit(type_text, (x, y + 45))
     
     def draw_controls(self, screen, x, y):
         #Draw control instructions
-        font = pygame.font.SysFont("Arial", 14)
+        font = get_font("Arial", 14)
         controls = [
             "Controls: Arrow Keys - Navigate | Enter - Use Item | I/Tab - Close",
             f"Items: {len(self.items)}/{self.max_slots}"
         ]
         
         for i, control in enumerate(controls):
-            text = font.render(control, True, (150, 150, 150))
+            text = render_text(font, control, (150, 150, 150))
             screen.blit(text, (x, y + i * 20))
     
     def draw_equipment_slot(self, screen, slot_type, x, y):
@@ -314,8 +395,8 @@ class Inventory:
                         (x, y, self.equipment_slot_size, self.equipment_slot_size), 2)
         
         # Draw slot label
-        font = pygame.font.SysFont("Arial", 16)
-        label = font.render(slot_type.title(), True, (200, 200, 200))
+        font = get_font("Arial", 16)
+        label = render_text(font, slot_type.title(), (200, 200, 200))
         screen.blit(label, (x, y - 25))
         
         # Draw equipped item if any
@@ -324,7 +405,7 @@ class Inventory:
             item.draw(screen, x + 16, y + 16, 32)
             
             # Draw item name
-            name = font.render(item.name, True, (255, 255, 255))
+            name = render_text(font, item.name, (255, 255, 255))
             screen.blit(name, (x + self.equipment_slot_size + 10, y + 20))
     
     def save_to_dict(self):
@@ -333,11 +414,7 @@ class Inventory:
             'max_slots': self.max_slots,
             'items': [
                 {
-                    'name': item.name,
-                    'description': item.description,
-                    'item_type': item.item_type,
-                    'stackable': item.stackable,
-                    'max_stack': item.max_stack,
+                    'id': item.id,
                     'quantity': item.quantity
                 }
                 for item in self.items
@@ -347,15 +424,14 @@ class Inventory:
     def load_from_dict(self, data):
         #Load inventory from dictionary
         self.max_slots = data.get('max_slots', 20)
-        self.items = []
+        items = []
         
         for item_data in data.get('items', []):
-            item = Item(
-                name=item_data['name'],
-                description=item_data['description'],
-                item_type=item_data['item_type'],
-                stackable=item_data['stackable'],
-                max_stack=item_data['max_stack']
-            )
-            item.quantity = item_data['quantity']
-            self.items.append(item)
+            if 'id' in item_data:
+                definition = item_registry.get(item_data['id'])
+            else:
+                # Older saves spelled every field out
+                definition = item_registry.resolve(item_data['name'], item_data['description'], item_data['item_type'],
+                                                   item_data['stackable'], item_data['max_stack'])
+            items.append(Item(definition, item_data['quantity']))
+        self.items = items
@@ -1,26 +1,138 @@
-import pygame
+import json
 import os
+import pygame
+from typing import Dict, Optional
+from assets import get_image
 
-class Item:
-    def __init__(self, name, description, item_type, stackable=False, max_stack=1, image_path=None):
+ITEMS_FILE = os.path.join(os.path.dirname(__file__), "assets", "items.json")
+
+class ItemDefinition:
+    # Everything items of one kind share: loaded once, then referenced by every instance (flyweight)
+    __slots__ = ("id", "name", "description", "item_type", "stackable", "max_stack", "image_path",
+                 "defense", "damage_bonus", "heal")
+
+    def __init__(self, item_id, name, description, item_type, stackable=False, max_stack=1, image_path=None,
+                 defense=0, damage_bonus=0, heal=0):
+        self.id = item_id
         self.name = name
         self.description = description
         self.item_type = item_type  # "weapon", "armor", "consumable", "key"
         self.stackable = stackable
         self.max_stack = max_stack
-        self.quantity = 1
-        
-        # Load image if provided
-        self.image = None
-        if image_path:
-            try:
-                base_path = os.path.dirname(__file__)
-                full_path = os.path.join(base_path, "assets", "sprites", image_path)
-                if os.path.exists(full_path):
-                    self.image = pygame.image.load(full_path).convert_alpha()
-                    self.image = pygame.transform.scale(self.image, (32, 32))
-            except:
-                print(f"Could not load image: {image_path}")
+        self.image_path = image_path
+        self.defense = defense              # Damage absorbed per hit while worn (armor)
+        self.damage_bonus = damage_bonus    # Extra attack damage while equipped (weapons)
+        self.heal = heal                    # Health restored when used (consumables)
+
+    def __repr__(self):
+        return f"ItemDefinition({self.id!r}, {self.name!r})"
+
+class ItemRegistry:
+    # Item definitions by id, plus a case-folded name lookup
+    def __init__(self):
+        self.definitions: Dict[str, ItemDefinition] = {}
+        self.by_name: Dict[str, ItemDefinition] = {}
+
+    def register(self, definition: ItemDefinition) -> ItemDefinition:
+        self.definitions[definition.id] = definition
+        self.by_name[definition.name.casefold()] = definition
+        return definition
+
+    def load(self, path: str = ITEMS_FILE) -> None:
+        # Read definitions from a JSON object of id -> fields (see assets/items.json)
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        for item_id, fields in data.items():
+            self.register(ItemDefinition(
+                item_id, fields["name"], fields.get("description", ""), fields["type"],
+                stackable=fields.get("stackable", False), max_stack=fields.get("max_stack", 1),
+                image_path=fields.get("image"), defense=fields.get("defense", 0),
+                damage_bonus=fields.get("damage_bonus", 0), heal=fields.get("heal", 0)))
+
+    def get(self, item_id: str) -> ItemDefinition:
+        # Raises KeyError for an unknown id
+        return self.definitions[item_id]
+
+    def find(self, name: str) -> Optional[ItemDefinition]:
+        # Look a definition up by its display name (any case)
+        return self.by_name.get(name.casefold())
+
+    def resolve(self, name, description, item_type, stackable=False, max_stack=1, image_path=None) -> ItemDefinition:
+        # Definition for an item known only by its fields (e.g. an old save): the registered one with
+        # that name, or a new definition built from the fields
+        definition = self.find(name)
+        if definition is None:
+            item_id = name.casefold().replace(" ", "_")
+            definition = self.register(ItemDefinition(item_id, name, description, item_type, stackable,
+                                                      max_stack, image_path))
+        return definition
+
+    def create(self, item_id: str, quantity: int = 1) -> "Item":
+        return Item(self.definitions[item_id], quantity)
+
+item_registry = ItemRegistry()
+item_registry.load()
+
+class Item:
+    # One item (or stack) in the world: a shared definition plus its own quantity
+    __slots__ = ("definition", "quantity")
+
+    def __init__(self, definition, quantity=1):
+        if isinstance(definition, str):
+            definition = item_registry.get(definition)
+        self.definition = definition
+        self.quantity = quantity
+
+    # Shared data comes straight from the definition
+    @property
+    def id(self):
+        return self.definition.id
+
+    @property
+    def name(self):
+        return self.definition.name
+
+    @property
+    def description(self):
+        return self.definition.description
+
+    @property
+    def item_type(self):
+        return self.definition.item_type
+
+    @property
+    def stackable(self):
+        return self.definition.stackable
+
+    @property
+    def max_stack(self):
+        return self.definition.max_stack
+
+    @property
+    def image_path(self):
+        return self.definition.image_path
+
+    @property
+    def defense(self):
+        return self.definition.defense
+
+    @property
+    def damage_bonus(self):
+        return self.definition.damage_bonus
+
+    @property
+    def image(self):
+        # Loaded on first use and shared between every item using the same file, so items can be
+        # created by the headless game core without touching the sprites
+        if not self.image_path:
+            return None
+        try:
+            return get_image(self.image_path, (32, 32))
+        except FileNotFoundError:
+            return None
+        except pygame.error:
+            print(f"Could not load image: {self.image_path}")
+            return None
     
     def use(self, player):
         # Use the item on the player
@@ -32,11 +144,12 @@ class Item:
     
     def use_consumable(self, player):
         # Use a consumable item (health potion, etc.)
-        if self.name.lower() == "health potion":
+        heal = self.definition.heal
+        if heal:
             if hasattr(player, 'health'):
                 if player.health >= player.max_health:
                     return False  # Can't use potion at full health
-                player.health = min(player.max_health, player.health + 20)
+                player.health = min(player.max_health, player.health + heal)
                 return True
         return False
     
@@ -47,10 +160,7 @@ class Item:
     
     def can_stack_with(self, other_item):
         # Check if this item can stack with another item
-        return (self.stackable and 
-                other_item.stackable and 
-                self.name == other_item.name and 
-                self.item_type == other_item.item_type)
+        return self.stackable and self.definition is other_item.definition
     
     def add_to_stack(self, amount=1):
         #Add items to the stack
@@ -79,8 +189,8 @@ class Item:
     def draw(self, screen, x, y, size=32):
         #Draw the item at the specified position
         if self.image:
-            scaled_image = pygame.transform.scale(self.image, (size, size))
-            screen.blit(scaled_image, (x, y))
+            # Scaled variants come from the asset cache instead of being rebuilt every draw
+            screen.blit(get_image(self.image_path, (size, size)), (x, y))
         else:
             # Draw a placeholder rectangle
             pygame.draw.rect(screen, (128, 128, 128), (x, y, size, size))
@@ -90,26 +200,24 @@ class Item:
         return self.get_display_name()
     
     def __repr__(self):
-        return f"Item('{self.name}', '{self.description}', '{self.item_type}')"
+        return f"Item({self.id!r}, quantity={self.quantity})"
 
 
-# Predefined items for the game
+# Predefined items for the game (definitions live in assets/items.json)
 def create_health_potion():
-    return Item("Health Potion", "Restores 20 health points", "consumable", True, 10, "potion.png")
+    return item_registry.create("health_potion")
 
 def create_sword():
-    return Item("Iron Sword", "A basic iron sword", "weapon", False, 1, "sword.png")
+    return item_registry.create("iron_sword")
 
 def create_key():
-    return Item("Old Key", "An old rusty key", "key", False, 1, "key.png")
+    return item_registry.create("old_key")
 
 def create_armor():
-    # Updated armor creation with defense value
-    return Item("Leather Armor", "Basic leather armor (Defense +3)", "armor", False, 1, "armor.png")
+    return item_registry.create("leather_armor")
 
-# Add more armor types if desired:
 def create_iron_armor():
-    return Item("Iron Armor", "Strong iron armor (Defense +5)", "armor", False, 1, "iron_armor.png")
+    return item_registry.create("iron_armor")
 
 def create_steel_armor():
-    return Item("Steel Armor", "Powerful steel armor (Defense +7)", "armor", False, 1, "steel_armor.png")
+    return item_registry.create("steel_armor")
@@ -0,0 +1,286 @@
+import os
+import re
+import struct
+import zlib
+from typing import Iterator, List, Tuple
+from worldgen import seed_to_map_id
+from savegame import (SAVE_DIR, SaveManager, BinaryWriter, BinaryReader, write_item, read_item,
+                      decode_snapshot, restore_snapshot)
+
+AUTOSAVE_NAME = "autosave"
+COMPACT_BYTES = 256 * 1024     # Start a new checkpoint once the journal grows past this
+POSITION_INTERVAL = 15         # Ticks between player position/health records (while they change)
+
+# Journal file layout: a file header, then a sequence of records, each
+#   header   record type (uint8), payload length (uint16), CRC-32 of the payload (uint32)
+#   payload  type-specific fields
+# A torn or corrupt record (e.g. from a crash mid-write) ends the journal; everything before it is replayed
+# The file header names the map the records were written against (its world seed), so a journal is never
+# replayed onto a snapshot of a different map (e.g. one from before a Ctrl+R)
+JOURNAL_MAGIC = b"AJNL"
+JOURNAL_VERSION = 1
+JOURNAL_HEADER = struct.Struct("<4sBQ")  # magic, format version, world seed
+RECORD = struct.Struct("<BHI")
+CHEST_OPENED = 1     # x, y
+TILE_SET = 2         # x, y, tile
+PLAYER_STATE = 3     # x, y, health, max_health
+INVENTORY_ADD = 4    # item
+INVENTORY_REMOVE = 5 # slot, amount
+INVENTORY_EQUIP = 6  # slot
+INVENTORY_UNEQUIP = 7  # equipment type
+INVENTORY_SORT = 8   # 0 by type, 1 by name
+INVENTORY_CLEAR = 9
+CHEST_FORMAT = struct.Struct("<II")
+TILE_FORMAT = struct.Struct("<IIB")
+PLAYER_FORMAT = struct.Struct("<iiii")
+SLOT_FORMAT = struct.Struct("<HH")
+
+def encode_record(record_type: int, payload: bytes = b"") -> bytes:
+    return RECORD.pack(record_type, len(payload), zlib.crc32(payload)) + payload
+
+def read_journal(path: str, seed: int) -> Iterator[Tuple[int, bytes]]:
+    # Yield (record type, payload) for every intact record in a journal file
+    # Raises ValueError if the journal isn't one or was written for a different map than seed's
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return
+    if len(data) < JOURNAL_HEADER.size:
+        return  # Torn before its header was written, so it holds no records either
+    magic, version, journal_seed = JOURNAL_HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION:
+        raise ValueError("Not an autosave journal, or from an unsupported version")
+    if journal_seed != seed:
+        raise ValueError(f"Journal is for map {seed_to_map_id(journal_seed)}, not {seed_to_map_id(seed)}")
+    offset = JOURNAL_HEADER.size
+    while offset + RECORD.size <= len(data):
+        record_type, length, checksum = RECORD.unpack_from(data, offset)
+        payload = data[offset + RECORD.size:offset + RECORD.size + length]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            return
+        yield record_type, payload
+        offset += RECORD.size + length
+
+def apply_record(core, record_type: int, payload: bytes) -> None:
+    # Replay one journal record onto the game
+    inventory = core.player.inventory
+    if record_type == CHEST_OPENED:
+        core.map.mark_chest_opened(*CHEST_FORMAT.unpack(payload))
+    elif record_type == TILE_SET:
+        core.map.set_tile(*TILE_FORMAT.unpack(payload))
+    elif record_type == PLAYER_STATE:
+        x, y, health, max_health = PLAYER_FORMAT.unpack(payload)
+        core.player.rect.x = x
+        core.player.rect.y = y
+        core.player.health = health
+        core.player.max_health = max_health
+    elif record_type == INVENTORY_ADD:
+        inventory.add_item(read_item(BinaryReader(payload)))
+    elif record_type == INVENTORY_REMOVE:
+        inventory.remove_item(*SLOT_FORMAT.unpack(payload))
+    elif record_type == INVENTORY_EQUIP:
+        inventory.equip_item(SLOT_FORMAT.unpack(payload)[0])
+    elif record_type == INVENTORY_UNEQUIP:
+        inventory.unequip_item(payload.decode("utf-8"))
+    elif record_type == INVENTORY_SORT:
+        if payload[0]:
+            inventory.sort_by_name()
+        else:
+            inventory.sort_by_type()
+    elif record_type == INVENTORY_CLEAR:
+        inventory.clear()
+
+def _generations(directory: str, name: str) -> List[int]:
+    # Checkpoint generations with a snapshot or journal on disk, oldest first
+    pattern = re.compile(re.escape(name) + r"\.(\d+)\.(sav|journal)$")
+    generations = set()
+    try:
+        for entry in os.scandir(directory):
+            match = pattern.match(entry.name)
+            if match:
+                generations.add(int(match.group(1)))
+    except OSError:
+        pass
+    return sorted(generations)
+
+class Autosave:
+    # Incremental autosave: a full snapshot at each checkpoint, then an append-only journal of changes
+    # Files are <name>.<generation>.sav and <name>.<generation>.journal. Checkpoint n's snapshot is written
+    # in the background while its journal is already being appended to; older generations are deleted
+    # only once the new snapshot is safely on disk, so recovery always has a snapshot plus every change since
+    def __init__(self, core, directory: str = SAVE_DIR, name: str = AUTOSAVE_NAME,
+                 compact_bytes: int = COMPACT_BYTES, position_interval: int = POSITION_INTERVAL):
+        self.core = core
+        self.directory = directory
+        self.name = name
+        self.compact_bytes = compact_bytes
+        self.position_interval = position_interval
+        self.writer = SaveManager()
+        self.generation = 0
+        self.journal = None
+        self.journal_bytes = 0
+        self.buffer = []          # Encoded records waiting for the next flush
+        self.last_player_state = None
+        self.ticks_since_position = 0
+        self.needs_checkpoint = False
+        self.running = False
+        self.records = 0
+
+    def path(self, generation: int, extension: str) -> str:
+        return os.path.join(self.directory, f"{self.name}.{generation}.{extension}")
+
+    def start(self) -> None:
+        # Attach to the map and inventory and write the first checkpoint
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        generations = _generations(self.directory, self.name)
+        self.generation = generations[-1] if generations else 0
+        self.core.map.add_change_listener(self.on_map_change)
+        self.core.player.inventory.listener = self.on_inventory_change
+        self.running = True
+        self.checkpoint()
+
+    def stop(self, discard: bool = False) -> None:
+        # Detach and close the journal; discard deletes every autosave file (e.g. after a clean exit)
+        if not self.running:
+            return
+        self.running = False
+        self.core.map.remove_change_listener(self.on_map_change)
+        if self.core.player.inventory.listener == self.on_inventory_change:
+            self.core.player.inventory.listener = None
+        self.flush()
+        self.writer.wait()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if discard:
+            for generation in _generations(self.directory, self.name):
+                self._delete_generation(generation)
+
+    def _record(self, record_type: int, payload: bytes = b"") -> None:
+        # Queue one record; it reaches the file at the next flush (once per tick)
+        self.buffer.append(encode_record(record_type, payload))
+        self.records += 1
+
+    def on_map_change(self, change: str, x: int, y: int, tile: int) -> None:
+        if change == "chest":
+            self._record(CHEST_OPENED, CHEST_FORMAT.pack(x, y))
+        elif change == "tile":
+            self._record(TILE_SET, TILE_FORMAT.pack(x, y, tile))
+        else:
+            # A whole new map: the next checkpoint replaces the journal. What is queued so far belongs to
+            # the old map's journal; anything recorded until then is covered by the new snapshot
+            self.flush()
+            self.needs_checkpoint = True
+
+    def on_inventory_change(self, operation: str, *arguments) -> None:
+        if operation == "add":
+            writer = BinaryWriter()
+            write_item(writer, arguments[0])
+            self._record(INVENTORY_ADD, writer.getvalue())
+        elif operation == "remove":
+            self._record(INVENTORY_REMOVE, SLOT_FORMAT.pack(*arguments))
+        elif operation == "equip":
+            self._record(INVENTORY_EQUIP, SLOT_FORMAT.pack(arguments[0], 0))
+        elif operation == "unequip":
+            self._record(INVENTORY_UNEQUIP, arguments[0].encode("utf-8"))
+        elif operation in ("sort_by_type", "sort_by_name"):
+            self._record(INVENTORY_SORT, bytes([operation == "sort_by_name"]))
+        elif operation == "clear":
+            self._record(INVENTORY_CLEAR)
+
+    def flush(self) -> None:
+        if self.buffer and self.journal is not None:
+            data = b"".join(self.buffer)
+            self.journal.write(data)
+            self.journal.flush()
+            self.journal_bytes += len(data)
+        self.buffer = []
+
+    def update(self) -> None:
+        # Call once per tick: sample the player, flush new records and compact when the journal is large
+        if not self.running:
+            return
+        self.ticks_since_position += 1
+        if self.ticks_since_position >= self.position_interval:
+            self.ticks_since_position = 0
+            player = self.core.player
+            state = (player.rect.x, player.rect.y, player.health, player.max_health)
+            if state != self.last_player_state:
+                self.last_player_state = state
+                self._record(PLAYER_STATE, PLAYER_FORMAT.pack(*state))
+        if self.needs_checkpoint or self.journal_bytes >= self.compact_bytes:
+            self.checkpoint()
+        else:
+            self.flush()
+        # Once a checkpoint's snapshot is on disk, everything before it can go
+        for path, error in self.writer.poll():
+            if error is None:
+                generation = int(path.rsplit(".", 2)[-2])
+                for old in _generations(self.directory, self.name):
+                    if old < generation:
+                        self._delete_generation(old)
+            else:
+                print(f"Autosave failed: {error}")
+
+    def checkpoint(self) -> None:
+        # Compact: snapshot the game now (written in the background) and start a fresh journal
+        if self.needs_checkpoint:
+            self.buffer = []  # Changes made on the new map since it was installed; the snapshot has them
+        else:
+            self.flush()
+        if self.journal is not None:
+            self.journal.close()
+        self.generation += 1
+        self.journal = open(self.path(self.generation, "journal"), "wb")
+        self.journal.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, self.core.map.world.seed))
+        self.journal.flush()
+        self.journal_bytes = 0
+        self.needs_checkpoint = False
+        self.writer.save(self.core, self.path(self.generation, "sav"))
+
+    def _delete_generation(self, generation: int) -> None:
+        for extension in ("sav", "journal"):
+            try:
+                os.remove(self.path(generation, extension))
+            except OSError:
+                pass
+
+def _replay(core, journal_paths: List[str]) -> int:
+    # Apply journal records in order; stops at the first record that can't be applied (e.g. an item id
+    # that is no longer defined) or the first journal for another map, since everything after it builds
+    # on it. Returns the records applied.
+    applied = 0
+    seed = core.map.world.seed
+    for path in journal_paths:
+        try:
+            for record_type, payload in read_journal(path, seed):
+                apply_record(core, record_type, payload)
+                applied += 1
+        except (ValueError, struct.error, IndexError) as error:
+            print(f"Autosave replay stopped at {os.path.basename(path)}: {error}")
+            return applied
+    return applied
+
+def recover(core, directory: str = SAVE_DIR, name: str = AUTOSAVE_NAME) -> bool:
+    # Crash recovery: load the newest usable autosave snapshot and replay every journal written since
+    # A snapshot that can't be read or restored falls back to the generation before it
+    # Returns False if there is nothing to recover
+    generations = _generations(directory, name)
+    for index in range(len(generations) - 1, -1, -1):
+        snapshot_path = os.path.join(directory, f"{name}.{generations[index]}.sav")
+        listener = core.player.inventory.listener
+        core.player.inventory.listener = None
+        try:
+            with open(snapshot_path, "rb") as file:
+                snapshot = decode_snapshot(file.read())
+            restore_snapshot(core, snapshot)
+            _replay(core, [os.path.join(directory, f"{name}.{generation}.journal") for generation in generations[index:]])
+        except (OSError, ValueError):
+            continue
+        finally:
+            core.player.inventory.listener = listener
+        return True
+    return False
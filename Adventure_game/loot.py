@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Union
+from item import Item, item_registry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Batched draws are resolved one at a time in pure Python instead
+
+LOOT_FILE = os.path.join(os.path.dirname(__file__), "assets", "loot.json")
+COIN_SCALE = 1 << 32  # Alias thresholds are stored as 32-bit integers, so every backend draws the same items
+
+class AliasTable:
+    # Vose's alias method: O(n) to build, then every draw is one column pick and one biased coin flip
+    # A draw uses two random 32-bit words: the first picks a column, the second is compared with the
+    # column's threshold to keep the column or take its alias. Integer-only, so numpy and pure Python agree.
+    def __init__(self, weights: List[float]):
+        count = len(weights)
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            raise ValueError("A loot table needs at least one entry with a positive weight")
+        scaled = [weight * count / total for weight in weights]
+        self.thresholds = array('Q', [COIN_SCALE] * count)
+        self.aliases = array('I', range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low = small.pop()
+            high = large.pop()
+            self.thresholds[low] = int(scaled[low] * COIN_SCALE)
+            self.aliases[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Whatever is left over is 1.0 up to rounding and keeps its own column
+        self.size = count
+        if np is not None:
+            self.np_thresholds = np.frombuffer(self.thresholds, dtype=np.uint64)
+            self.np_aliases = np.frombuffer(self.aliases, dtype=np.uint32)
+
+    def sample(self, rng) -> int:
+        column = (rng.getrandbits(32) * self.size) >> 32
+        return column if rng.getrandbits(32) < self.thresholds[column] else self.aliases[column]
+
+    def sample_many(self, count: int, rng) -> List[int]:
+        # count draws from one block of random bits (two words per draw, column word first)
+        if count <= 0:
+            return []
+        data = rng.getrandbits(64 * count).to_bytes(8 * count, "little")
+        size = self.size
+        if np is not None:
+            words = np.frombuffer(data, dtype="<u4").reshape(count, 2).astype(np.uint64)
+            columns = (words[:, 0] * size) >> 32
+            keep = words[:, 1] < self.np_thresholds[columns]
+            return np.where(keep, columns, self.np_aliases[columns]).tolist()
+        words = array('I')
+        words.frombytes(data)
+        if sys.byteorder == "big":
+            words.byteswap()
+        thresholds = self.thresholds
+        aliases = self.aliases
+        results = []
+        for index in range(0, 2 * count, 2):
+            column = (words[index] * size) >> 32
+            results.append(column if words[index + 1] < thresholds[column] else aliases[column])
+        return results
+
+class LootDrop:
+    # One possible outcome of a loot table once nested tables are flattened
+    __slots__ = ("item_id", "rarity", "probability")
+
+    def __init__(self, item_id: str, rarity: Optional[str], probability: float):
+        self.item_id = item_id
+        self.rarity = rarity
+        self.probability = probability
+
+    def __repr__(self):
+        return f"LootDrop({self.item_id!r}, {self.rarity!r}, {self.probability:.4f})"
+
+class LootTable:
+    # Weighted entries, each an item id or another LootTable (e.g. a rarity tier)
+    # Nested tables are flattened into one distribution over items when the table is first drawn from,
+    # so a draw costs the same however deep the nesting goes
+    def __init__(self, name: str, entries: List[Tuple[float, Union[str, "LootTable"]]], rarity: Optional[str] = None):
+        self.name = name
+        self.entries = entries
+        self.rarity = rarity
+        self.drops = None
+        self.alias = None
+
+    def flatten(self, rarity: Optional[str] = None, scale: float = 1.0, seen=()) -> List[Tuple[str, Optional[str], float]]:
+        # (item id, rarity, probability) for every item reachable from this table
+        # An item takes the rarity of the innermost table that sets one
+        if self.name in seen:
+            raise ValueError(f"Loot table {self.name!r} contains itself")
+        rarity = self.rarity or rarity
+        total = float(sum(weight for weight, _ in self.entries))
+        flat = []
+        for weight, entry in self.entries:
+            if weight <= 0:
+                continue
+            if isinstance(entry, LootTable):
+                flat.extend(entry.flatten(rarity, scale * weight / total, seen + (self.name,)))
+            else:
+                flat.append((entry, rarity, scale * weight / total))
+        return flat
+
+    def compile(self) -> None:
+        # Build the flattened drops and their alias table; identical (item, rarity) outcomes are merged
+        merged: Dict[Tuple[str, Optional[str]], float] = {}
+        for item_id, rarity, probability in self.flatten():
+            merged[(item_id, rarity)] = merged.get((item_id, rarity), 0.0) + probability
+        self.drops = [LootDrop(item_id, rarity, probability) for (item_id, rarity), probability in merged.items()]
+        self.alias = AliasTable([drop.probability for drop in self.drops])
+
+    def _alias(self) -> AliasTable:
+        if self.alias is None:
+            self.compile()
+        return self.alias
+
+    def draw(self, rng=None) -> Item:
+        # A single item; rng is a random.Random (the random module's generator if omitted)
+        index = self._alias().sample(rng or random)
+        return item_registry.create(self.drops[index].item_id)
+
+    def draw_drops(self, count: int, rng=None) -> List[LootDrop]:
+        # count draws in one batch; rng is a random.Random or a seed, and the same seed always gives the same drops
+        if not isinstance(rng, random.Random):
+            rng = random.Random(rng)
+        return self.drops_for(self._alias().sample_many(count, rng))
+
+    def draw_items(self, count: int, rng=None) -> List[Item]:
+        return [item_registry.create(drop.item_id) for drop in self.draw_drops(count, rng)]
+
+    def drops_for(self, indices: List[int]) -> List[LootDrop]:
+        drops = self.drops
+        return [drops[index] for index in indices]
+
+class LootRegistry:
+    # Loot tables by name, loaded from a data file
+    def __init__(self):
+        self.tables: Dict[str, LootTable] = {}
+
+    def load(self, path: str = LOOT_FILE) -> None:
+        # Read a JSON object of name -> {"rarity": optional tier, "entries": [{"item" or "table", "weight"}]}
+        # Tables may refer to tables defined later in the file
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        for name, fields in data.items():
+            self.tables[name] = LootTable(name, [], fields.get("rarity"))
+        for name, fields in data.items():
+            entries = self.tables[name].entries
+            for entry in fields["entries"]:
+                if "table" in entry:
+                    entries.append((entry["weight"], self.tables[entry["table"]]))
+                else:
+                    item_registry.get(entry["item"])  # Unknown ids fail here, not on the first draw
+                    entries.append((entry["weight"], entry["item"]))
+
+    def get(self, name: str) -> LootTable:
+        # Raises KeyError for an unknown table
+        return self.tables[name]
+
+loot_tables = LootRegistry()
+loot_tables.load()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Draw from a loot table and show the distribution")
+    parser.add_argument("table", nargs="?", default="chest")
+    parser.add_argument("--draws", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = loot_tables.get(args.table)
+    start = time.perf_counter()
+    drops = table.draw_drops(args.draws, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{args.draws} draws from {table.name!r}, {'numpy' if np is not None else 'pure Python'}, {elapsed:.3f}s")
+    counts = Counter((drop.item_id, drop.rarity) for drop in drops)
+    for drop in table.drops:
+        seen = counts[(drop.item_id, drop.rarity)] / max(args.draws, 1)
+        print(f"  {drop.item_id:16} {drop.rarity or '-':10} expected {drop.probability:7.2%}  drawn {seen:7.2%}")
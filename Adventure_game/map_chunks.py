@@ -0,0 +1,94 @@
+import pygame
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+CHUNK_TILES = 16        # Width and height of a chunk in tiles
+MAX_CACHED_CHUNKS = 12  # Baked chunks kept in memory (16x16 tiles at 64px is ~4 MB each)
+
+class ChunkCache:
+    # Bakes the tile map into fixed-size chunk surfaces so a frame only needs a few blits
+    def __init__(self, draw_tile: Callable, tile_size: int, chunk_tiles: int = CHUNK_TILES,
+                 max_chunks: int = MAX_CACHED_CHUNKS, background=(255, 255, 255)):
+        self.draw_tile = draw_tile  # draw_tile(surface, tile, pos) paints one tile
+        self.tile_size = tile_size
+        self.chunk_tiles = chunk_tiles
+        self.chunk_pixels = chunk_tiles * tile_size
+        self.max_chunks = max_chunks
+        self.background = background
+        self.tile_map = None
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> Surface, least recently drawn first
+        self.dirty = set()
+        self.bakes = 0
+
+    def reset(self, tile_map=None) -> None:
+        # Drop every baked chunk, e.g. after the map has been regenerated
+        self.tile_map = tile_map
+        self.chunks.clear()
+        self.dirty.clear()
+
+    def invalidate_tile(self, x: int, y: int) -> None:
+        # Mark the chunk holding tile (x, y) for a lazy re-bake
+        key = (x // self.chunk_tiles, y // self.chunk_tiles)
+        if key in self.chunks:
+            self.dirty.add(key)
+
+    def _map_size(self) -> Tuple[int, int]:
+        return self.tile_map.width, self.tile_map.height
+
+    def _bake(self, chunk_x: int, chunk_y: int, surface: Optional[pygame.Surface] = None) -> pygame.Surface:
+        # Render every tile of one chunk onto its own surface
+        map_width, map_height = self._map_size()
+        start_x = chunk_x * self.chunk_tiles
+        start_y = chunk_y * self.chunk_tiles
+        end_x = min(map_width, start_x + self.chunk_tiles)
+        end_y = min(map_height, start_y + self.chunk_tiles)
+        if surface is None:
+            surface = pygame.Surface(((end_x - start_x) * self.tile_size, (end_y - start_y) * self.tile_size))
+        surface.fill(self.background)
+        for y in range(start_y, end_y):
+            row = self.tile_map.row(y)
+            for x in range(start_x, end_x):
+                self.draw_tile(surface, row[x], ((x - start_x) * self.tile_size, (y - start_y) * self.tile_size))
+        self.bakes += 1
+        return surface
+
+    def _get_chunk(self, chunk_x: int, chunk_y: int) -> pygame.Surface:
+        key = (chunk_x, chunk_y)
+        surface = self.chunks.get(key)
+        if surface is None:
+            surface = self._bake(chunk_x, chunk_y)
+            self.chunks[key] = surface
+            # Evict the chunk that has gone longest without being drawn
+            while len(self.chunks) > self.max_chunks:
+                old_key, _ = self.chunks.popitem(last=False)
+                self.dirty.discard(old_key)
+        else:
+            if key in self.dirty:
+                self._bake(chunk_x, chunk_y, surface)
+                self.dirty.discard(key)
+            self.chunks.move_to_end(key)
+        return surface
+
+    def draw(self, screen: pygame.Surface, tile_map, camera_x: float = 0, camera_y: float = 0) -> int:
+        # Blit the chunks that overlap the screen and return how many were drawn
+        if tile_map is not self.tile_map:
+            self.reset(tile_map)
+        map_width, map_height = self._map_size()
+        if not map_width:
+            return 0
+        screen_width, screen_height = screen.get_size()
+        left = int(camera_x)
+        top = int(camera_y)
+        chunks_x = (map_width - 1) // self.chunk_tiles + 1
+        chunks_y = (map_height - 1) // self.chunk_tiles + 1
+        first_x = max(0, left // self.chunk_pixels)
+        first_y = max(0, top // self.chunk_pixels)
+        last_x = min(chunks_x, (left + screen_width - 1) // self.chunk_pixels + 1)
+        last_y = min(chunks_y, (top + screen_height - 1) // self.chunk_pixels + 1)
+        drawn = 0
+        for chunk_y in range(first_y, last_y):
+            for chunk_x in range(first_x, last_x):
+                surface = self._get_chunk(chunk_x, chunk_y)
+                screen.blit(surface, (chunk_x * self.chunk_pixels - left, chunk_y * self.chunk_pixels - top))
+                drawn += 1
+        return drawn
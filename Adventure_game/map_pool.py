@@ -0,0 +1,109 @@
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+from worldgen import new_seed
+
+DEFAULT_POOL_DEPTH = 2  # Finished maps kept ready
+DEFAULT_WORKERS = 1     # Background generators
+
+class MapPool:
+    # Keeps a few finished maps ready so regeneration is a swap instead of a stall
+    # generate(seed) builds a map; validate(map) returns False for maps that should be thrown away
+    # Generation is pure Python and holds the GIL, so it runs in worker processes by default; a generator
+    # thread would take interpreter time from the game loop on every refill. Threads are only the fallback
+    # for platforms where a process pool can't be created (or use_processes=False), where refills cost frames
+    def __init__(self, generate: Callable, depth: int = DEFAULT_POOL_DEPTH, workers: int = DEFAULT_WORKERS,
+                 validate: Optional[Callable] = None, use_processes: bool = True):
+        self.generate = generate
+        self.validate = validate
+        self.depth = depth
+        self.workers = workers
+        self.use_processes = use_processes
+        self.ready = queue.Queue(maxsize=depth)
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.executor = None
+        self.lock = threading.Lock()
+        self.metrics = {
+            'served': 0,     # Maps handed out from the pool
+            'dry': 0,        # Requests that found the pool empty
+            'generated': 0,  # Maps built by the workers
+            'rejected': 0,   # Maps that failed validation
+        }
+
+    def start(self) -> None:
+        # Start the background workers (generation runs in worker processes when use_processes is set)
+        if self.threads:
+            return
+        self.stop_event.clear()
+        if self.use_processes:
+            try:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            except (OSError, NotImplementedError, ImportError):
+                self.executor = None  # No working multiprocessing here: generate on the threads instead
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"map-pool-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.metrics[name] += 1
+
+    def _build(self, seed: int):
+        executor = self.executor
+        if executor is not None:
+            try:
+                return executor.submit(self.generate, seed).result()
+            except BrokenProcessPool:
+                # A worker process died (e.g. killed by the OS); carry on generating on the threads
+                self.executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+        return self.generate(seed)
+
+    def _work(self) -> None:
+        while not self.stop_event.is_set():
+            seed = new_seed()
+            try:
+                tile_map = self._build(seed)
+            except RuntimeError:
+                # The executor was shut down while we were waiting on it
+                return
+            self._count('generated')
+            if self.validate is not None and not self.validate(tile_map):
+                self._count('rejected')
+                continue
+            # Wait for a free slot, checking regularly whether the pool is stopping
+            while not self.stop_event.is_set():
+                try:
+                    self.ready.put((seed, tile_map), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def take(self) -> Optional[Tuple[int, object]]:
+        # Return a ready (seed, map) pair without blocking, or None if the pool has run dry
+        try:
+            item = self.ready.get_nowait()
+        except queue.Empty:
+            self._count('dry')
+            return None
+        self._count('served')
+        return item
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.metrics)
+        stats['ready'] = self.ready.qsize()
+        return stats
@@ -0,0 +1,149 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+from tilemap import TileMap
+
+MAP_CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache", "maps")
+MAP_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Least recently used maps are evicted above this size
+
+# File layout (little-endian):
+#   header   magic, format version, flags, the cache key (seed, generation parameters and generator version),
+#            final map size, boss/goal/entrance positions, chest count and tile payload length
+#   chests   chest_count pairs of uint32 (x, y)
+#   tiles    width * height bytes, zlib-compressed when FLAG_COMPRESSED is set
+MAGIC = b"ADVMAP"
+FORMAT_VERSION = 2  # 2: generator version added to the key
+FLAG_COMPRESSED = 1
+HEADER = struct.Struct("<6sBBQIIHHHHIIiiiiiiII")
+CHEST = struct.Struct("<II")
+
+def cache_key(seed: int, width: int, height: int, boss_room_width: int, boss_room_height: int, num_chests: int,
+              generator_version: int) -> Tuple:
+    # generator_version changes whenever the generator's output does, so older maps are never served again
+    return (seed, width, height, boss_room_width, boss_room_height, num_chests, generator_version)
+
+def _find_one(tile_map: TileMap, tile: int) -> Tuple[int, int]:
+    index = tile_map.data.find(tile)
+    if index == -1:
+        return -1, -1
+    return index % tile_map.width, index // tile_map.width
+
+def encode_map(key: Tuple, tile_map: TileMap, compress: bool = False) -> bytes:
+    # Pack a generated map and its metadata into the binary cache format
+    chests = tile_map.find_all(2)
+    boss_x, boss_y = _find_one(tile_map, 5)
+    goal_x, goal_y = _find_one(tile_map, 6)
+    entrance_x, entrance_y = _find_one(tile_map, 3)
+    payload = zlib.compress(bytes(tile_map.data), 6) if compress else bytes(tile_map.data)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_COMPRESSED if compress else 0, *key,
+                         tile_map.width, tile_map.height, boss_x, boss_y, goal_x, goal_y, entrance_x, entrance_y, len(chests), len(payload))
+    return header + b"".join(CHEST.pack(x, y) for x, y in chests) + payload
+
+def decode_map(buffer, key: Optional[Tuple] = None) -> Tuple[TileMap, Dict]:
+    # Unpack a map from the binary cache format; raises ValueError if it is invalid or was built for another key
+    if len(buffer) < HEADER.size:
+        raise ValueError("Map file is truncated")
+    (magic, version, flags, *stored_key, width, height,
+     boss_x, boss_y, goal_x, goal_y, entrance_x, entrance_y, chest_count, payload_length) = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a map file, or written by another version")
+    if key is not None and tuple(stored_key) != tuple(key):
+        raise ValueError("Map file was generated with different parameters")
+    offset = HEADER.size
+    chests = [CHEST.unpack_from(buffer, offset + i * CHEST.size) for i in range(chest_count)]
+    offset += chest_count * CHEST.size
+    payload = buffer[offset:offset + payload_length]
+    if len(payload) != payload_length:
+        raise ValueError("Map file is truncated")
+    tiles = zlib.decompress(payload) if flags & FLAG_COMPRESSED else payload
+    tile_map = TileMap(width, height, data=bytearray(tiles))
+    metadata = {
+        'seed': stored_key[0],
+        'chests': chests,
+        'boss': (boss_x, boss_y),
+        'goal': (goal_x, goal_y),
+        'entrance': (entrance_x, entrance_y),
+    }
+    return tile_map, metadata
+
+class MapCache:
+    # Directory of generated maps keyed by seed and generation parameters, with LRU eviction by total size
+    def __init__(self, directory: str = MAP_CACHE_DIR, max_bytes: int = MAP_CACHE_MAX_BYTES, compress: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress  # Uncompressed files are read straight from an mmap
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key: Tuple) -> str:
+        seed, width, height, boss_room_width, boss_room_height, num_chests, generator_version = key
+        name = f"{seed:016x}-{width}x{height}-b{boss_room_width}x{boss_room_height}-c{num_chests}-g{generator_version}.map"
+        return os.path.join(self.directory, name)
+
+    def load(self, key: Tuple) -> Optional[Tuple[TileMap, Dict]]:
+        # Return (tile_map, metadata) for key, or None if it isn't cached
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    result = decode_map(buffer, key)
+            # Touch the file so eviction sees it as recently used
+            os.utime(path)
+        except (OSError, ValueError, zlib.error):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def store(self, key: Tuple, tile_map: TileMap) -> None:
+        # Write the map atomically, then evict old entries if the cache is over budget
+        # Encode first: a key that doesn't fit the header (e.g. a negative seed) never touches the disk
+        try:
+            data = encode_map(key, tile_map, self.compress)
+        except struct.error as error:
+            print(f"Could not cache map: {error}")
+            return
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except OSError as error:
+            print(f"Could not cache map: {error}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        # Delete least recently used maps until the cache fits in max_bytes
+        try:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".map"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        max_bytes = self.max_bytes
+        self.max_bytes = 0
+        self.evict()
+        self.max_bytes = max_bytes
@@ -0,0 +1,177 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from tilemap import TileMap
+from collision import CollisionGrid
+from pathfinding import DistanceField, UNREACHABLE
+
+SPAWN_TILE = (1, 1)  # Where the player starts on a new map
+# Tiles the player has to be able to walk to: chests, boss room entrance, boss and goal
+CHEST, ENTRANCE, BOSS, GOAL = 2, 3, 5, 6
+
+class MapReport:
+    # Result of validating one map: what can be reached from the spawn, and a few quality measures
+    def __init__(self):
+        self.spawn = SPAWN_TILE
+        self.spawn_open = False
+        self.floor_tiles = 0         # Walkable tiles on the map
+        self.reachable_tiles = 0     # Walkable tiles connected to the spawn
+        self.dead_ends = 0           # Reachable tiles with a single walkable neighbour
+        self.unreachable = []        # Chests, entrance, boss and goal tiles cut off from the spawn
+        self.chests = 0
+        self.chest_distances = []    # Walking distance from the spawn to each reachable chest
+        self.chest_quadrants = [0, 0, 0, 0]  # Chests in the top-left, top-right, bottom-left and bottom-right quarters
+        self.boss = None
+        self.goal = None
+        self.goal_distance = UNREACHABLE  # Shortest walk from the spawn to the goal, in tiles
+        self.field = None            # Distance field from the spawn, for shortest_path()
+
+    @property
+    def is_solvable(self) -> bool:
+        # The spawn is open, there is exactly one boss and goal, and everything that matters can be reached
+        return self.spawn_open and self.boss is not None and self.goal is not None and not self.unreachable
+
+    def shortest_path(self) -> Optional[List[Tuple[int, int]]]:
+        # Tiles from the goal back to the spawn, or None if the goal can't be reached
+        if self.field is None or self.goal is None:
+            return None
+        return self.field.path_from(*self.goal)
+
+    def stats(self) -> Dict:
+        distances = self.chest_distances
+        return {
+            'solvable': self.is_solvable,
+            'floor_tiles': self.floor_tiles,
+            'reachable_tiles': self.reachable_tiles,
+            'dead_ends': self.dead_ends,
+            'unreachable': len(self.unreachable),
+            'goal_distance': self.goal_distance,
+            'chests': self.chests,
+            'chest_distance_min': min(distances) if distances else None,
+            'chest_distance_mean': sum(distances) / len(distances) if distances else None,
+            'chest_distance_max': max(distances) if distances else None,
+            'chest_quadrants': list(self.chest_quadrants),
+        }
+
+def _find_single(tile_map: TileMap, tile: int) -> Optional[Tuple[int, int]]:
+    # Position of tile if it appears exactly once on the map
+    data = tile_map.data
+    index = data.find(tile)
+    if index == -1 or data.find(tile, index + 1) != -1:
+        return None
+    return index % tile_map.width, index // tile_map.width
+
+def validate_map(tile_map: TileMap, spawn: Tuple[int, int] = SPAWN_TILE, grid: Optional[CollisionGrid] = None) -> MapReport:
+    # Check a map with a single flood fill from the spawn (linear in the map size)
+    if grid is None:
+        grid = CollisionGrid(1)
+        grid.rebuild(tile_map)
+    return _report(tile_map, spawn, grid, DistanceField(grid, [spawn]))
+
+def _report(tile_map: TileMap, spawn: Tuple[int, int], grid: CollisionGrid, field: DistanceField) -> MapReport:
+    # Fill in a report from a finished distance field (one pass over the map, no further flood fill)
+    report = MapReport()
+    report.spawn = spawn
+    report.spawn_open = not grid.is_solid(*spawn)
+    report.field = field
+    distances = field.distances
+    width = tile_map.width
+    height = tile_map.height
+    solid = grid.solid
+
+    report.floor_tiles = len(solid) - solid.count(1)
+    # Count reachable tiles and dead ends in one pass over the fill
+    reachable = 0
+    dead_ends = 0
+    last_row = width * (height - 1)
+    for index, distance in enumerate(distances):
+        if distance == UNREACHABLE:
+            continue
+        reachable += 1
+        x = index % width
+        neighbours = ((index >= width and not solid[index - width]) + (x + 1 < width and not solid[index + 1]) +
+                      (index < last_row and not solid[index + width]) + (x > 0 and not solid[index - 1]))
+        if neighbours == 1:
+            dead_ends += 1
+    report.reachable_tiles = reachable
+    report.dead_ends = dead_ends
+
+    for x, y in tile_map.find_all(CHEST):
+        report.chests += 1
+        report.chest_quadrants[(y >= height // 2) * 2 + (x >= width // 2)] += 1
+        distance = field.distance(x, y)
+        if distance == UNREACHABLE:
+            report.unreachable.append((x, y))
+        else:
+            report.chest_distances.append(distance)
+    for x, y in tile_map.find_all(ENTRANCE):
+        if not field.is_reachable(x, y):
+            report.unreachable.append((x, y))
+    report.boss = _find_single(tile_map, BOSS)
+    if report.boss is not None and not field.is_reachable(*report.boss):
+        report.unreachable.append(report.boss)
+    report.goal = _find_single(tile_map, GOAL)
+    if report.goal is not None:
+        report.goal_distance = field.distance(*report.goal)
+        if report.goal_distance == UNREACHABLE:
+            report.unreachable.append(report.goal)
+    return report
+
+def _carve_to(tile_map: TileMap, field: DistanceField, target: Tuple[int, int]) -> List[int]:
+    # Open the fewest walls needed to join target to the area reachable from the spawn
+    # 0-1 breadth-first search from the target: stepping onto floor costs 0, through a wall costs 1
+    # The outer border is never carved. Returns the indices of the walls removed.
+    width = tile_map.width
+    height = tile_map.height
+    data = tile_map.data
+    start = target[1] * width + target[0]
+    cost = {start: 0}
+    came_from = {start: -1}
+    queue = deque([start])
+    end = -1
+    while queue:
+        index = queue.popleft()
+        if field.distances[index] != UNREACHABLE:
+            end = index
+            break
+        x = index % width
+        y = index // width
+        for nx, ny in ((x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y)):
+            if nx <= 0 or ny <= 0 or nx >= width - 1 or ny >= height - 1:
+                continue
+            neighbour = ny * width + nx
+            step = 1 if data[neighbour] == 1 else 0
+            new_cost = cost[index] + step
+            if new_cost < cost.get(neighbour, new_cost + 1):
+                cost[neighbour] = new_cost
+                came_from[neighbour] = index
+                if step:
+                    queue.append(neighbour)
+                else:
+                    queue.appendleft(neighbour)
+    carved = []
+    while end != -1:
+        if data[end] == 1:
+            data[end] = 0
+            carved.append(end)
+        end = came_from[end]
+    return carved
+
+def repair_map(tile_map: TileMap, spawn: Tuple[int, int] = SPAWN_TILE) -> MapReport:
+    # Fix what can be fixed in place: open the spawn and carve corridors to anything cut off from it
+    # The map is flood-filled once; each corridor then extends that fill locally (see DistanceField.open_cells)
+    # Returns the report for the repaired map (check is_solvable, a missing boss or goal can't be repaired)
+    if tile_map.get(*spawn) == 1:
+        tile_map.set(spawn[0], spawn[1], 0)
+    grid = CollisionGrid(1)
+    grid.rebuild(tile_map)
+    field = DistanceField(grid, [spawn])
+    width = tile_map.width
+    for tile in (CHEST, ENTRANCE, BOSS, GOAL):
+        for target in tile_map.find_all(tile):
+            if field.is_reachable(*target):
+                continue  # Reachable from the start, or joined up by an earlier corridor
+            carved = _carve_to(tile_map, field, target)
+            for index in carved:
+                grid.update_tile(index % width, index // width, 0)
+            field.open_cells(grid, carved)
+    return _report(tile_map, spawn, grid, field)
@@ -1,15 +1,16 @@
 import pygame
-import os
+from assets import get_image
 
 class NPC:
     def __init__(self, x, y, dialogue):
         self.rect = pygame.Rect(x, y, 40, 40)
         self.dialogue = dialogue
         self.spoken = False
-        base_path = os.path.dirname(__file__)
-        sprite_path = os.path.join(base_path, "assets", "sprites", "npc.png")
-        self.image = pygame.image.load(sprite_path).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (self.rect.width, self.rect.height))
+
+    @property
+    def image(self):
+        # Sprite is loaded on first draw so NPCs also work headless
+        return get_image("npc.png", (self.rect.width, self.rect.height))
 
     def interact(self, player_rect):
         if self.rect.colliderect(player_rect):
@@ -0,0 +1,38 @@
+import pygame
+from typing import Callable, Dict, Tuple
+
+# Translucent overlays and static panel backgrounds, built once and reused every frame.
+# Entries are keyed by size, and the whole cache is dropped when the display mode changes.
+_cache: Dict[tuple, pygame.Surface] = {}
+
+def _new_surface(size: Tuple[int, int]) -> pygame.Surface:
+    surface = pygame.Surface(size)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    return surface
+
+def get_overlay(screen: pygame.Surface, alpha: int, colour=(0, 0, 0)) -> pygame.Surface:
+    # Return a full-window translucent overlay matching the current screen size
+    key = ('overlay', screen.get_size(), alpha, tuple(colour))
+    overlay = _cache.get(key)
+    if overlay is None:
+        overlay = _new_surface(screen.get_size())
+        overlay.fill(colour)
+        overlay.set_alpha(alpha)
+        _cache[key] = overlay
+    return overlay
+
+def get_panel(name, size: Tuple[int, int], build: Callable[[pygame.Surface], None]) -> pygame.Surface:
+    # Return the cached panel called name, calling build(surface) the first time it is needed
+    # name must include anything that changes the panel's static content
+    key = ('panel', name, tuple(size))
+    panel = _cache.get(key)
+    if panel is None:
+        panel = _new_surface(size)
+        build(panel)
+        _cache[key] = panel
+    return panel
+
+def invalidate() -> None:
+    # Drop every cached surface, e.g. after the window size or fullscreen mode changes
+    _cache.clear()
@@ -0,0 +1,220 @@
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from typing import Iterable, List, Optional, Tuple
+from collision import CollisionGrid
+
+MAX_CACHED_FIELDS = 16  # Distance fields kept per map version
+UNREACHABLE = -1
+NO_DIRECTION = 255
+# Neighbour offsets as (dx, dy): up, right, down, left
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+Tile = Tuple[int, int]
+
+class DistanceField:
+    # Walking distance (in tiles) from every cell to the nearest target, plus a flow field:
+    # the direction of the first step towards the target from each cell
+    # One field answers "where do I go next?" for any number of agents heading to the same target
+    def __init__(self, grid: CollisionGrid, targets: Iterable[Tile]):
+        width = grid.width
+        height = grid.height
+        solid = grid.solid
+        self.width = width
+        self.height = height
+        self.targets = tuple(targets)
+        self.wall_version = grid.wall_version
+        distances = array('i', [UNREACHABLE]) * (width * height)
+        directions = bytearray([NO_DIRECTION]) * (width * height)
+
+        # Breadth-first search outwards from all targets at once
+        frontier = []
+        for x, y in self.targets:
+            if 0 <= x < width and 0 <= y < height and not solid[y * width + x]:
+                index = y * width + x
+                if distances[index] == UNREACHABLE:
+                    distances[index] = 0
+                    frontier.append(index)
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                x = index % width
+                # Direction stored on the neighbour points back towards this cell (opposite of the step taken)
+                if index >= width:
+                    neighbour = index - width
+                    if distances[neighbour] == UNREACHABLE and not solid[neighbour]:
+                        distances[neighbour] = distance
+                        directions[neighbour] = 2
+                        next_frontier.append(neighbour)
+                if x + 1 < width:
+                    neighbour = index + 1
+                    if distances[neighbour] == UNREACHABLE and not solid[neighbour]:
+                        distances[neighbour] = distance
+                        directions[neighbour] = 3
+                        next_frontier.append(neighbour)
+                if index + width < width * height:
+                    neighbour = index + width
+                    if distances[neighbour] == UNREACHABLE and not solid[neighbour]:
+                        distances[neighbour] = distance
+                        directions[neighbour] = 0
+                        next_frontier.append(neighbour)
+                if x > 0:
+                    neighbour = index - 1
+                    if distances[neighbour] == UNREACHABLE and not solid[neighbour]:
+                        distances[neighbour] = distance
+                        directions[neighbour] = 1
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        self.distances = distances
+        self.directions = directions
+
+    def open_cells(self, grid: CollisionGrid, cells: Iterable[int]) -> None:
+        # Update the field in place after the walls at cells (flat indices) were opened in grid
+        # Only tiles whose distance gets shorter are revisited, so a short corridor costs far less than a new fill
+        width = self.width
+        size = width * self.height
+        solid = grid.solid
+        distances = self.distances
+        directions = self.directions
+        queue = deque()
+        for index in cells:
+            x = index % width
+            for neighbour, inside in ((index - width, index >= width), (index + 1, x + 1 < width),
+                                      (index + width, index + width < size), (index - 1, x > 0)):
+                if inside and distances[neighbour] != UNREACHABLE:
+                    queue.append(neighbour)
+        while queue:
+            index = queue.popleft()
+            distance = distances[index] + 1
+            x = index % width
+            # As in the fill, the direction stored on the neighbour points back towards this cell
+            for neighbour, direction, inside in ((index - width, 2, index >= width), (index + 1, 3, x + 1 < width),
+                                                 (index + width, 0, index + width < size), (index - 1, 1, x > 0)):
+                if inside and not solid[neighbour] and (distances[neighbour] == UNREACHABLE or distances[neighbour] > distance):
+                    distances[neighbour] = distance
+                    directions[neighbour] = direction
+                    queue.append(neighbour)
+        self.wall_version = grid.wall_version
+
+    def distance(self, x: int, y: int) -> int:
+        # Steps to the nearest target, or -1 if it can't be reached from (x, y)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return UNREACHABLE
+        return self.distances[y * self.width + x]
+
+    def is_reachable(self, x: int, y: int) -> bool:
+        return self.distance(x, y) != UNREACHABLE
+
+    def next_step(self, x: int, y: int) -> Optional[Tile]:
+        # The neighbouring tile to move to from (x, y); None at a target or when no route exists
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        direction = self.directions[y * self.width + x]
+        if direction == NO_DIRECTION:
+            return None
+        dx, dy = DIRECTIONS[direction]
+        return x + dx, y + dy
+
+    def path_from(self, x: int, y: int) -> Optional[List[Tile]]:
+        # Full route from (x, y) to the nearest target (both ends included), or None if unreachable
+        if not self.is_reachable(x, y):
+            return None
+        path = [(x, y)]
+        step = self.next_step(x, y)
+        while step is not None:
+            path.append(step)
+            step = self.next_step(*step)
+        return path
+
+def astar(grid: CollisionGrid, start: Tile, goal: Tile) -> Optional[List[Tile]]:
+    # Shortest 4-way route from start to goal (both ends included), or None if there isn't one
+    width = grid.width
+    height = grid.height
+    solid = grid.solid
+    start_x, start_y = start
+    goal_x, goal_y = goal
+    if grid.is_solid(start_x, start_y) or grid.is_solid(goal_x, goal_y):
+        return None
+    start_index = start_y * width + start_x
+    goal_index = goal_y * width + goal_x
+    came_from = {start_index: -1}
+    cost = {start_index: 0}
+    # Entries are (estimated total, steps so far, index); Manhattan distance never overestimates on a 4-way grid
+    open_heap = [(abs(goal_x - start_x) + abs(goal_y - start_y), 0, start_index)]
+    while open_heap:
+        _, steps, index = heapq.heappop(open_heap)
+        if index == goal_index:
+            path = []
+            while index != -1:
+                path.append((index % width, index // width))
+                index = came_from[index]
+            path.reverse()
+            return path
+        if steps > cost[index]:
+            continue  # Stale entry, a shorter route was found since
+        x = index % width
+        y = index // width
+        for dx, dy in DIRECTIONS:
+            nx = x + dx
+            ny = y + dy
+            if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                continue
+            neighbour = ny * width + nx
+            if solid[neighbour]:
+                continue
+            new_steps = steps + 1
+            if new_steps < cost.get(neighbour, new_steps + 1):
+                cost[neighbour] = new_steps
+                came_from[neighbour] = index
+                heapq.heappush(open_heap, (new_steps + abs(goal_x - nx) + abs(goal_y - ny), new_steps, neighbour))
+    return None
+
+class Pathfinder:
+    # Route queries over a CollisionGrid
+    # Distance fields are cached by target and thrown away only when the grid's walls change
+    def __init__(self, grid: CollisionGrid, max_fields: int = MAX_CACHED_FIELDS):
+        self.grid = grid
+        self.max_fields = max_fields
+        self.fields = OrderedDict()  # Targets tuple -> DistanceField, least recently used first
+        self.wall_version = grid.wall_version
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self) -> None:
+        if self.grid.wall_version != self.wall_version:
+            self.fields.clear()
+            self.wall_version = self.grid.wall_version
+
+    def field_to(self, *targets: Tile) -> DistanceField:
+        # Shared distance/flow field towards the nearest of targets (e.g. the player, the goal, the boss room)
+        self._check_version()
+        key = tuple(sorted(targets))
+        field = self.fields.get(key)
+        if field is not None:
+            self.hits += 1
+            self.fields.move_to_end(key)
+            return field
+        self.misses += 1
+        field = DistanceField(self.grid, key)
+        self.fields[key] = field
+        if len(self.fields) > self.max_fields:
+            self.fields.popitem(last=False)
+        return field
+
+    def find_path(self, start: Tile, goal: Tile) -> Optional[List[Tile]]:
+        # Point-to-point route; reuses a cached field for goal when there is one, otherwise runs A*
+        self._check_version()
+        field = self.fields.get((goal,))
+        if field is not None:
+            self.hits += 1
+            return field.path_from(*start)
+        return astar(self.grid, start, goal)
+
+    def next_step(self, start: Tile, goal: Tile) -> Optional[Tile]:
+        # First tile to move to on the way from start to goal (builds or reuses the field for goal)
+        return self.field_to(goal).next_step(*start)
+
+    def stats(self):
+        return {'fields': len(self.fields), 'hits': self.hits, 'misses': self.misses}
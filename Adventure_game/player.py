@@ -1,26 +1,14 @@
 import pygame
-import os
 from inventory import Inventory
 from item import Item
-
-def can_move_rect(rect):
-    # Check all four corners of the rect using current map state
-    from map import can_move
-    return (
-        can_move(rect.left, rect.top) and
-        can_move(rect.right - 1, rect.top) and
-        can_move(rect.left, rect.bottom - 1) and
-        can_move(rect.right - 1, rect.bottom - 1)
-    )
-
-def get_current_can_move():
-    #Get the current can_move function that uses the updated map
-    from map import can_move
-    return can_move
+from assets import get_image
+from fonts import get_font, render_text
 
 class Player:
-    def __init__(self, x, y):
+    # collision_grid is the map's CollisionGrid; it is rebuilt in place when the map changes, so it is passed once
+    def __init__(self, x, y, collision_grid):
         self.rect = pygame.Rect(x, y, 50, 50)
+        self.collision_grid = collision_grid
         self.last_update = pygame.time.get_ticks() / 1000.0
         self.colour = (0, 0, 255)
         self.base_speed = 500  # Pixels per second
@@ -31,20 +19,22 @@ class Player:
         
         # Inventory system
         self.inventory = Inventory(max_slots=20)
-        
-        # Load player sprite using absolute path
-        base_path = os.path.dirname(__file__)
-        sprite_path = os.path.join(base_path, "assets", "sprites", "player.png")
-        self.image = pygame.image.load(sprite_path).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (self.rect.width, self.rect.height))
 
         self.x = float(x)  # Store actual position as float
         self.y = float(y)
+        self.prev_x = self.x  # Position before the last move, for interpolated drawing
+        self.prev_y = self.y
         self.last_update = pygame.time.get_ticks() / 1000.0
 
-    def move(self, keys):
-        # Get time since last frame in seconds
-        dt = pygame.time.get_ticks() / 1000.0 - self.last_update
+    @property
+    def image(self):
+        # Player sprite is shared through the asset cache, loaded on first draw so the player also works headless
+        return get_image("player.png", (self.rect.width, self.rect.height))
+
+    def move(self, keys, dt=None):
+        # Move for dt seconds (a fixed simulation step); without dt, use the time since the last call
+        if dt is None:
+            dt = pygame.time.get_ticks() / 1000.0 - self.last_update
         self.last_update = pygame.time.get_ticks() / 1000.0
         
         # Calculate movement vector
@@ -64,25 +54,22 @@ class Player:
             dx *= 0.707  # 1/√2
             dy *= 0.707
 
-        # Store potential new position
-        new_x = self.x + dx
-        new_y = self.y + dy
+        # Pick up any position change made directly on the rect (e.g. respawn)
+        if int(self.x) != self.rect.x:
+            self.x = float(self.rect.x)
+        if int(self.y) != self.rect.y:
+            self.y = float(self.rect.y)
+        self.prev_x = self.x
+        self.prev_y = self.y
 
-        # Check horizontal movement
+        # Sweep each axis against the collision bitmap so a long frame can't skip through a wall
+        grid = self.collision_grid
         if dx != 0:
-            new_rect = self.rect.copy()
-            new_rect.x = int(new_x)
-            if can_move_rect(new_rect):
-                self.x = new_x
-                self.rect.x = int(self.x)
-
-        # Check vertical movement
+            self.x = grid.sweep_x(self.x, self.rect.y, self.rect.width, self.rect.height, dx)
+            self.rect.x = int(self.x)
         if dy != 0:
-            new_rect = self.rect.copy()
-            new_rect.y = int(new_y)
-            if can_move_rect(new_rect):
-                self.y = new_y
-                self.rect.y = int(self.y)
+            self.y = grid.sweep_y(self.rect.x, self.y, self.rect.width, self.rect.height, dy)
+            self.rect.y = int(self.y)
 
     def handle_input(self, event):
         # Handle player input including inventory
@@ -131,13 +118,19 @@ class Player:
         # Check if player is alive
         return self.health > 0
     
-    def draw(self, screen, camera_x=0.0, camera_y=0.0):
+    def draw(self, screen, camera_x=0.0, camera_y=0.0, alpha=1.0):
         # Draw the sprite image instead of a rectangle
-        screen_pos = (self.rect.x - camera_x, self.rect.y - camera_y)
+        # alpha blends between the previous and current simulation positions
+        offset_x = 0.0
+        offset_y = 0.0
+        if alpha < 1.0 and int(self.x) == self.rect.x and int(self.y) == self.rect.y:
+            offset_x = (self.prev_x - self.x) * (1.0 - alpha)
+            offset_y = (self.prev_y - self.y) * (1.0 - alpha)
+        screen_pos = (self.rect.x + offset_x - camera_x, self.rect.y + offset_y - camera_y)
         screen.blit(self.image, screen_pos)
         
         # Draw health bar
-        self.draw_health_bar(screen, camera_x, camera_y)
+        self.draw_health_bar(screen, camera_x - offset_x, camera_y - offset_y)
         
         # Draw inventory if open
         self.inventory.draw(screen)
@@ -161,8 +154,8 @@ class Player:
         pygame.draw.rect(screen, (255, 255, 255), (x, y, bar_width, bar_height), 2)
         
         # Health text
-        font = pygame.font.SysFont("Arial", 8)
-        health_text = font.render(f"{self.health}/{self.max_health}", True, (255, 255, 255))
+        font = get_font("Arial", 8)
+        health_text = render_text(font, f"{self.health}/{self.max_health}", (255, 255, 255))
         text_x = x + (bar_width - health_text.get_width()) // 2
         text_y = y + (bar_height - health_text.get_height()) // 2
         screen.blit(health_text, (text_x, text_y))
@@ -198,11 +191,6 @@ class Player:
         base_defense = 0
         armor = self.get_equipped_armor()
         if armor:
-            # Different armor types could provide different defense values
-            if armor.name == "Leather Armor":
-                base_defense += 3
-            elif armor.name == "Iron Armor":
-                base_defense += 5
-            elif armor.name == "Steel Armor":
-                base_defense += 7
+            # Each armor's defense comes from its item definition
+            base_defense += armor.defense
         return base_defense
\ No newline at end of file
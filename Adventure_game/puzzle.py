@@ -1,11 +1,35 @@
 import pygame
 import random
+from fonts import get_font, render_text
+import overlays
+
+# Answer input box, relative to the puzzle box
+INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT = 200, 50
+INPUT_BOX_X, INPUT_BOX_Y = 150, 150
+
+def build_puzzle_panel(panel):
+    # Static part of the puzzle: box, border, empty input box and instructions
+    box_width, box_height = panel.get_size()
+    panel.fill((30, 30, 30))
+    pygame.draw.rect(panel, (100, 100, 100), (0, 0, box_width, box_height), 3)
+
+    # Answer input box
+    pygame.draw.rect(panel, (80, 80, 80), (INPUT_BOX_X, INPUT_BOX_Y, INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT))
+    pygame.draw.rect(panel, (150, 150, 150), (INPUT_BOX_X, INPUT_BOX_Y, INPUT_BOX_WIDTH, INPUT_BOX_HEIGHT), 2)
+
+    # Instructions
+    font_small = get_font("Arial", 18)
+    instructions = render_text(font_small, "Type your answer and press Enter", (180, 180, 180))
+    inst_rect = instructions.get_rect(center=(box_width // 2, box_height - 30))
+    panel.blit(instructions, inst_rect)
 
 class MathPuzzle:
-    def __init__(self):
-        self.num1 = random.randint(1, 10)
-        self.num2 = random.randint(1, 10)
-        self.operator = random.choice(['+', '-', '*'])
+    def __init__(self, rng=None):
+        # rng lets a seeded world reproduce the same puzzle; defaults to the global random module
+        rng = rng or random
+        self.num1 = rng.randint(1, 10)
+        self.num2 = rng.randint(1, 10)
+        self.operator = rng.choice(['+', '-', '*'])
         self.user_answer = ""
         self.active = True
 
@@ -38,38 +62,23 @@ class MathPuzzle:
             return
 
         # Create a semi-transparent overlay
-        overlay = pygame.Surface((1500, 1000))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
+        screen.blit(overlays.get_overlay(screen, 200), (0, 0))
 
-        # Puzzle box
+        # Puzzle box, input box and instructions (built once)
         box_width, box_height = 500, 300
         box_x = (1500 - box_width) // 2
         box_y = (1000 - box_height) // 2
-        pygame.draw.rect(screen, (30, 30, 30), (box_x, box_y, box_width, box_height))
-        pygame.draw.rect(screen, (100, 100, 100), (box_x, box_y, box_width, box_height), 3)
+        screen.blit(overlays.get_panel("puzzle", (box_width, box_height), build_puzzle_panel), (box_x, box_y))
 
         # Question text
-        font = pygame.font.SysFont("Arial", 36)
-        question_text = font.render(self.question, True, (255, 255, 255))
+        font = get_font("Arial", 36)
+        question_text = render_text(font, self.question, (255, 255, 255))
         text_rect = question_text.get_rect(center=(box_x + box_width // 2, box_y + 80))
         screen.blit(question_text, text_rect)
 
-        # Answer input box
-        input_box_width, input_box_height = 200, 50
-        input_box_x = (1500 - input_box_width) // 2
-        input_box_y = box_y + 150
-        pygame.draw.rect(screen, (80, 80, 80), (input_box_x, input_box_y, input_box_width, input_box_height))
-        pygame.draw.rect(screen, (150, 150, 150), (input_box_x, input_box_y, input_box_width, input_box_height), 2)
-
         # User answer text
-        answer_text = font.render(self.user_answer, True, (255, 255, 255))
-        answer_rect = answer_text.get_rect(center=(input_box_x + input_box_width // 2, input_box_y + input_box_height // 2))
+        input_box_x = box_x + INPUT_BOX_X
+        input_box_y = box_y + INPUT_BOX_Y
+        answer_text = render_text(font, self.user_answer, (255, 255, 255))
+        answer_rect = answer_text.get_rect(center=(input_box_x + INPUT_BOX_WIDTH // 2, input_box_y + INPUT_BOX_HEIGHT // 2))
         screen.blit(answer_text, answer_rect)
-
-        # Instructions
-        font_small = pygame.font.SysFont("Arial", 18)
-        instructions = font_small.render("Type your answer and press Enter", True, (180, 180, 180))
-        inst_rect = instructions.get_rect(center=(box_x + box_width // 2, box_y + box_height - 30))
-        screen.blit(instructions, inst_rect)
@@ -0,0 +1,289 @@
+import os
+import queue
+import random
+import struct
+import threading
+from typing import List, Optional, Tuple
+from tilemap import TileMap
+from item import Item, item_registry
+from combat import CombatSystem, Enemy
+
+SAVE_DIR = os.path.join(os.path.dirname(__file__), "saves")
+DEFAULT_SAVE = "quicksave.sav"
+
+# File layout (little-endian):
+#   header   magic, format version, flags, world seed, map size, opened chest count, state block length
+#   map      width * height tile bytes, exactly as held by the TileMap
+#   chests   opened chest positions as pairs of uint32 (x, y)
+#   state    player, inventory, equipment and combat, written field by field (see _encode_state)
+MAGIC = b"ADVSAV"
+FORMAT_VERSION = 2  # 2: items stored by definition id
+HEADER = struct.Struct("<6sBBQIIII")
+CHEST = struct.Struct("<II")
+RNG_STATE = struct.Struct("<625I")  # random.Random's Mersenne Twister state: 624 words plus position
+
+class BinaryWriter:
+    # Appends fixed-size fields and length-prefixed strings to a buffer
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt: str, *values) -> None:
+        self.parts.append(struct.pack("<" + fmt, *values))
+
+    def string(self, text: Optional[str]) -> None:
+        # None and "" are kept apart: 0xFFFF marks a missing string
+        if text is None:
+            self.pack("H", 0xFFFF)
+            return
+        data = text.encode("utf-8")
+        self.pack("H", len(data))
+        self.parts.append(data)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+class BinaryReader:
+    # Reads back what BinaryWriter wrote; raises ValueError if the data runs out
+    def __init__(self, buffer, offset: int = 0):
+        self.buffer = buffer
+        self.offset = offset
+
+    def unpack(self, fmt: str):
+        fmt = "<" + fmt
+        size = struct.calcsize(fmt)
+        if self.offset + size > len(self.buffer):
+            raise ValueError("Save file is truncated")
+        values = struct.unpack_from(fmt, self.buffer, self.offset)
+        self.offset += size
+        return values if len(values) > 1 else values[0]
+
+    def string(self) -> Optional[str]:
+        length = self.unpack("H")
+        if length == 0xFFFF:
+            return None
+        data = bytes(self.buffer[self.offset:self.offset + length])
+        if len(data) != length:
+            raise ValueError("Save file is truncated")
+        self.offset += length
+        return data.decode("utf-8")
+
+def write_item(writer: BinaryWriter, item: Optional[Item]) -> None:
+    # Items are stored by definition id; everything else comes back from the item registry
+    if item is None:
+        writer.pack("B", 0)
+        return
+    writer.pack("BH", 1, item.quantity)
+    writer.string(item.id)
+
+def read_item(reader: BinaryReader) -> Optional[Item]:
+    if not reader.unpack("B"):
+        return None
+    quantity = reader.unpack("H")
+    item_id = reader.string()
+    try:
+        return Item(item_registry.get(item_id), quantity)
+    except KeyError:
+        raise ValueError(f"Save refers to an unknown item: {item_id}") from None
+
+def _write_rng(writer: BinaryWriter, rng) -> None:
+    # Keep a seeded random stream's exact position so a loaded fight rolls the same numbers
+    state = rng.getstate() if hasattr(rng, "getstate") else None
+    if state is None or state[0] != 3 or state[2] is not None:
+        writer.pack("B", 0)
+        return
+    writer.pack("B", 1)
+    writer.parts.append(RNG_STATE.pack(*state[1]))
+
+def _read_rng(reader: BinaryReader):
+    if not reader.unpack("B"):
+        return None
+    internal = reader.unpack("625I")
+    rng = random.Random()
+    rng.setstate((3, tuple(internal), None))
+    return rng
+
+def _encode_state(core) -> bytes:
+    writer = BinaryWriter()
+    player = core.player
+    inventory = player.inventory
+    writer.pack("iiii", player.rect.x, player.rect.y, player.health, player.max_health)
+    writer.pack("Q", core.ticks)
+
+    # Inventory and equipment
+    writer.pack("HH", inventory.max_slots, len(inventory.items))
+    for item in inventory.items:
+        write_item(writer, item)
+    write_item(writer, inventory.equipment.get("weapon"))
+    write_item(writer, inventory.equipment.get("armor"))
+
+    # Combat
+    combat = core.combat_system
+    if combat is None:
+        writer.pack("B", 0)
+    else:
+        enemy = combat.enemy
+        writer.pack("B???HIiii", 1, combat.combat_active, combat.is_player_turn, combat.victory_screen,
+                    combat.selected_item_index, combat.victory_timer,
+                    enemy.health, enemy.max_health, enemy.attack_delay_ms)
+        writer.string(enemy.name)
+        writer.string(combat.message)
+        writer.pack("H", len(combat.pending_actions))
+        for remaining, action in combat.pending_actions:
+            writer.pack("d", remaining)
+            writer.string(action)
+        _write_rng(writer, combat.rng)
+    return writer.getvalue()
+
+def encode_snapshot(core) -> bytes:
+    # Pack the current game (map, opened chests, player, inventory, equipment, combat) into the save format
+    tile_map = core.map.tile_map
+    chests = sorted(core.map.opened_chests)
+    state = _encode_state(core)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, core.map.world.seed, tile_map.width, tile_map.height, len(chests), len(state))
+    return b"".join((header, tile_map.data, b"".join(CHEST.pack(x, y) for x, y in chests), state))
+
+class Snapshot:
+    # A decoded save file, ready to be applied with restore_snapshot
+    def __init__(self, seed: int, tile_map: TileMap, opened_chests: List[Tuple[int, int]], state: bytes):
+        self.seed = seed
+        self.tile_map = tile_map
+        self.opened_chests = opened_chests
+        self.state = state
+
+def decode_snapshot(buffer) -> Snapshot:
+    # Unpack a save file; raises ValueError if it is damaged or was written by another version
+    if len(buffer) < HEADER.size:
+        raise ValueError("Save file is truncated")
+    magic, version, flags, seed, width, height, chest_count, state_length = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a save file, or written by another version")
+    offset = HEADER.size
+    tiles = buffer[offset:offset + width * height]
+    offset += width * height
+    chests = [CHEST.unpack_from(buffer, offset + i * CHEST.size) for i in range(chest_count)]
+    offset += chest_count * CHEST.size
+    state = buffer[offset:offset + state_length]
+    if len(tiles) != width * height or len(state) != state_length:
+        raise ValueError("Save file is truncated")
+    return Snapshot(seed, TileMap(width, height, data=bytearray(tiles)), chests, bytes(state))
+
+def restore_snapshot(core, snapshot: Snapshot) -> None:
+    # Replace the running game with a decoded snapshot
+    # Everything is read before anything is applied, so a damaged save leaves the game untouched
+    reader = BinaryReader(snapshot.state)
+    player = core.player
+    x, y, health, max_health = reader.unpack("iiii")
+    ticks = reader.unpack("Q")
+    max_slots, item_count = reader.unpack("HH")
+    items = [read_item(reader) for _ in range(item_count)]
+    weapon = read_item(reader)
+    armor = read_item(reader)
+
+    combat = None
+    if reader.unpack("B"):
+        (combat_active, is_player_turn, victory_screen, selected_item_index, victory_timer,
+         enemy_health, enemy_max_health, attack_delay_ms) = reader.unpack("???HIiii")
+        enemy = Enemy(reader.string(), enemy_health, enemy_max_health, attack_delay_ms)
+        combat = CombatSystem(player, enemy)
+        combat.combat_active = combat_active
+        combat.is_player_turn = is_player_turn
+        combat.victory_screen = victory_screen
+        combat.selected_item_index = selected_item_index
+        combat.victory_timer = victory_timer
+        combat.message = reader.string()
+        for _ in range(reader.unpack("H")):
+            remaining = reader.unpack("d")
+            combat.pending_actions.append([remaining, reader.string()])
+        combat.rng = _read_rng(reader)
+
+    core.map.install(snapshot.tile_map, snapshot.seed, snapshot.opened_chests)
+    player.rect.x = x
+    player.rect.y = y
+    player.health = health
+    player.max_health = max_health
+    core.ticks = ticks
+    inventory = player.inventory
+    inventory.max_slots = max_slots
+    inventory.items = items
+    inventory.selected_slot = 0
+    inventory.equipment["weapon"] = weapon
+    inventory.equipment["armor"] = armor
+    if combat is not None and combat.rng is None:
+        combat.rng = core.map.world.rng("combat")
+    core.combat_system = combat
+
+    # Anything that was on screen belongs to the old game
+    core.puzzle_active = False
+    core.current_puzzle = None
+    core.dialogue_message = ""
+    core.npc_message_active = False
+    core.chest_message = ""
+    core.chest_message_active = False
+    core.ending_screen = False
+    core.actors.clear()
+
+def save_path(name: str = DEFAULT_SAVE) -> str:
+    return os.path.join(SAVE_DIR, name)
+
+def write_atomic(path: str, data: bytes) -> None:
+    # Write to a temporary file and rename it over path, so a crash never leaves a half-written save
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def load_game(core, path: Optional[str] = None) -> None:
+    # Read a save file and apply it to core; raises OSError or ValueError if it can't be loaded
+    with open(path or save_path(), "rb") as file:
+        data = file.read()
+    restore_snapshot(core, decode_snapshot(data))
+
+class SaveManager:
+    # Writes saves on a background thread so the game never waits on the disk
+    # The snapshot itself is taken on the calling thread, so it is consistent with the frame it was requested on
+    def __init__(self):
+        self.pending = queue.Queue()
+        self.results = queue.Queue()  # (path, error or None) for every finished save
+        self.thread = None
+
+    def save(self, core, path: Optional[str] = None) -> None:
+        self.pending.put((path or save_path(), encode_snapshot(core)))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._work, name="save-writer", daemon=True)
+            self.thread.start()
+
+    def _work(self) -> None:
+        while True:
+            path, data = self.pending.get()
+            try:
+                write_atomic(path, data)
+                self.results.put((path, None))
+            except OSError as error:
+                self.results.put((path, error))
+            finally:
+                self.pending.task_done()
+
+    def poll(self) -> List[Tuple[str, Optional[OSError]]]:
+        # Finished saves since the last call
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def wait(self) -> None:
+        # Block until every requested save has been written (e.g. before quitting)
+        self.pending.join()
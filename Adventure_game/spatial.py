@@ -0,0 +1,121 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+SPATIAL_CELL_SIZE = 128  # Pixels per bucket side (two tiles)
+
+class SpatialHash:
+    # Uniform grid of buckets over world pixels; each entity sits in every bucket its rect touches
+    # Entities need a .rect (pygame.Rect or anything with x, y, width and height)
+    # Moving an entity only touches the buckets it enters or leaves, usually none
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.buckets: Dict[Tuple[int, int], Set] = {}
+        self.cells: Dict[object, Tuple[int, int, int, int]] = {}  # Entity -> bucket range it is filed under
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __contains__(self, entity) -> bool:
+        return entity in self.cells
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def _cell_range(self, x: int, y: int, width: int, height: int) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return x // size, y // size, (x + max(width, 1) - 1) // size, (y + max(height, 1) - 1) // size
+
+    def _add_to_buckets(self, entity, cell_range: Tuple[int, int, int, int]) -> None:
+        first_x, first_y, last_x, last_y = cell_range
+        buckets = self.buckets
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = buckets.get((cell_x, cell_y))
+                if bucket is None:
+                    buckets[(cell_x, cell_y)] = bucket = set()
+                bucket.add(entity)
+
+    def _remove_from_buckets(self, entity, cell_range: Tuple[int, int, int, int]) -> None:
+        first_x, first_y, last_x, last_y = cell_range
+        buckets = self.buckets
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = buckets.get((cell_x, cell_y))
+                if bucket is not None:
+                    bucket.discard(entity)
+                    if not bucket:
+                        del buckets[(cell_x, cell_y)]
+
+    def insert(self, entity) -> None:
+        if entity in self.cells:
+            self.update(entity)
+            return
+        rect = entity.rect
+        cell_range = self._cell_range(rect.x, rect.y, rect.width, rect.height)
+        self.cells[entity] = cell_range
+        self._add_to_buckets(entity, cell_range)
+
+    def remove(self, entity) -> None:
+        cell_range = self.cells.pop(entity, None)
+        if cell_range is not None:
+            self._remove_from_buckets(entity, cell_range)
+
+    def update(self, entity) -> None:
+        # Call after an entity's rect changed; a no-op unless it crossed into other buckets
+        rect = entity.rect
+        cell_range = self._cell_range(rect.x, rect.y, rect.width, rect.height)
+        old_range = self.cells.get(entity)
+        if old_range == cell_range:
+            return
+        if old_range is not None:
+            self._remove_from_buckets(entity, old_range)
+        self.cells[entity] = cell_range
+        self._add_to_buckets(entity, cell_range)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.cells.clear()
+
+    def _candidates(self, x: int, y: int, width: int, height: int) -> Set:
+        # Every entity filed in a bucket that the pixel rectangle touches
+        first_x, first_y, last_x, last_y = self._cell_range(x, y, width, height)
+        buckets = self.buckets
+        found = set()
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = buckets.get((cell_x, cell_y))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def query_rect(self, x: int, y: int, width: int, height: int) -> List:
+        # Entities whose rect overlaps the pixel rectangle, ordered bottom edge last (back to front for drawing)
+        right = x + width
+        bottom = y + height
+        hits = [entity for entity in self._candidates(x, y, width, height)
+                if entity.rect.x < right and x < entity.rect.x + entity.rect.width
+                and entity.rect.y < bottom and y < entity.rect.y + entity.rect.height]
+        hits.sort(key=lambda entity: entity.rect.y + entity.rect.height)
+        return hits
+
+    def colliding(self, rect) -> List:
+        # Entities overlapping rect (AABB test), e.g. everything the player is touching
+        return self.query_rect(rect.x, rect.y, rect.width, rect.height)
+
+    def near(self, x: float, y: float, radius: float) -> List:
+        # Entities whose centre lies within radius pixels of (x, y), nearest first
+        candidates = self._candidates(int(x - radius), int(y - radius), int(2 * radius) + 1, int(2 * radius) + 1)
+        radius_squared = radius * radius
+        hits = []
+        for entity in candidates:
+            rect = entity.rect
+            dx = rect.x + rect.width / 2 - x
+            dy = rect.y + rect.height / 2 - y
+            distance_squared = dx * dx + dy * dy
+            if distance_squared <= radius_squared:
+                hits.append((distance_squared, entity))
+        hits.sort(key=lambda hit: hit[0])
+        return [entity for _, entity in hits]
+
+    def extend(self, entities: Iterable) -> None:
+        for entity in entities:
+            self.insert(entity)
@@ -0,0 +1,126 @@
+from typing import List, Optional, Tuple
+
+class TileMap:
+    # A grid of tile ids stored as one contiguous bytearray (one byte per tile)
+    # Tile (x, y) lives at index y * width + x
+    __slots__ = ("width", "height", "data", "report")
+
+    def __init__(self, width: int, height: int, fill: int = 0, data: Optional[bytearray] = None):
+        self.width = width
+        self.height = height
+        if data is None:
+            data = bytearray([fill]) * (width * height)
+        elif len(data) != width * height:
+            raise ValueError(f"Expected {width * height} tiles, got {len(data)}")
+        self.data = data if isinstance(data, bytearray) else bytearray(data)
+        self.report = None  # map_validator.MapReport, kept with a generated map so it isn't validated twice
+
+    @classmethod
+    def from_rows(cls, rows: List[List[int]]) -> "TileMap":
+        # Build a TileMap from a list of lists of tile ids
+        height = len(rows)
+        width = len(rows[0]) if height else 0
+        data = bytearray()
+        for row in rows:
+            data.extend(row)
+        return cls(width, height, data=data)
+
+    def to_rows(self) -> List[List[int]]:
+        return [list(self.row(y)) for y in range(self.height)]
+
+    def copy(self) -> "TileMap":
+        return TileMap(self.width, self.height, data=bytearray(self.data))
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get(self, x: int, y: int) -> int:
+        # Get the tile at (x, y); the caller is responsible for bounds checking
+        return self.data[y * self.width + x]
+
+    def set(self, x: int, y: int, tile: int) -> None:
+        self.data[y * self.width + x] = tile
+
+    def row(self, y: int) -> bytearray:
+        # Return a copy of row y
+        start = y * self.width
+        return self.data[start:start + self.width]
+
+    def column(self, x: int) -> bytearray:
+        # Return a copy of column x
+        return self.data[x::self.width]
+
+    def fill(self, tile: int, x: int = 0, y: int = 0, width: Optional[int] = None, height: Optional[int] = None) -> None:
+        # Set every tile in a rectangle (the whole map by default) to tile
+        if width is None:
+            width = self.width - x
+        if height is None:
+            height = self.height - y
+        if width <= 0 or height <= 0:
+            return
+        if x == 0 and width == self.width:
+            start = y * self.width
+            self.data[start:start + width * height] = bytes([tile]) * (width * height)
+            return
+        run = bytes([tile]) * width
+        for row_y in range(y, y + height):
+            start = row_y * self.width + x
+            self.data[start:start + width] = run
+
+    def extend_width(self, columns: int, fill: int = 0) -> None:
+        # Add columns filled with fill to the right-hand side of every row
+        padding = bytes([fill]) * columns
+        view = memoryview(self.data)
+        width = self.width
+        data = bytearray(padding.join(view[start:start + width] for start in range(0, len(self.data), width)))
+        if self.height:
+            data += padding
+        self.width += columns
+        self.data = data
+
+    def count(self, tile: int) -> int:
+        return self.data.count(tile)
+
+    def sample_positions(self, tile: int, k: int, rng) -> List[Tuple[int, int]]:
+        # Pick k distinct positions holding tile, uniformly at random, in one call
+        # Sparse picks draw random indices and keep the matching ones, so the map is never
+        # listed cell by cell; dense picks fall back to sampling from every match
+        total = self.data.count(tile)
+        if k > total:
+            raise ValueError(f"Only {total} tiles of type {tile}, cannot pick {k}")
+        size = len(self.data)
+        if k * 8 >= total:
+            indices = rng.sample(self._indices_of(tile), k)
+        else:
+            chosen = {}
+            data = self.data
+            randbelow = rng.randrange
+            while len(chosen) < k:
+                index = randbelow(size)
+                if data[index] == tile:
+                    chosen[index] = None  # dict keeps the draw order
+            indices = list(chosen)
+        width = self.width
+        return [(index % width, index // width) for index in indices]
+
+    def _indices_of(self, tile: int) -> List[int]:
+        indices = []
+        find = self.data.find
+        index = find(tile)
+        while index != -1:
+            indices.append(index)
+            index = find(tile, index + 1)
+        return indices
+
+    def find_all(self, tile: int) -> List[Tuple[int, int]]:
+        # Return the (x, y) position of every tile with the given id in row-major order
+        width = self.width
+        return [(index % width, index // width) for index in self._indices_of(tile)]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TileMap):
+            return NotImplemented
+        return self.width == other.width and self.height == other.height and self.data == other.data
+
+    def __repr__(self) -> str:
+        return f"TileMap({self.width}x{self.height})"
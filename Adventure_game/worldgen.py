@@ -0,0 +1,42 @@
+import random
+import re
+from typing import Optional
+
+MAP_ID_DIGITS = 16  # Map IDs are the seed written as 16 hex digits
+
+def new_seed() -> int:
+    # Pick a fresh 64-bit world seed
+    return random.SystemRandom().getrandbits(64)
+
+def seed_to_map_id(seed: int) -> str:
+    return f"{seed:0{MAP_ID_DIGITS}x}"
+
+def map_id_to_seed(map_id: str) -> int:
+    # Parse a map ID back into its seed; raises ValueError for anything that isn't a map ID
+    map_id = map_id.strip().lower()
+    if not re.fullmatch(f"[0-9a-f]{{1,{MAP_ID_DIGITS}}}", map_id):
+        raise ValueError(f"Invalid map ID: {map_id!r}")
+    return int(map_id, 16)
+
+class World:
+    # One world seed, split into independent random streams per subsystem
+    # (maze, chests, loot, puzzle, combat) so each can be reproduced on its own
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = new_seed() if seed is None else seed
+
+    @classmethod
+    def from_map_id(cls, map_id: str) -> "World":
+        return cls(map_id_to_seed(map_id))
+
+    @property
+    def map_id(self) -> str:
+        return seed_to_map_id(self.seed)
+
+    def rng(self, stream: str, *keys) -> random.Random:
+        # Return a fresh generator for a named stream, optionally narrowed by keys such as a chest position
+        # String seeds are hashed with SHA-512 by random.Random, so streams are stable across runs
+        name = ":".join([str(self.seed), stream] + [str(key) for key in keys])
+        return random.Random(name)
+
+    def __repr__(self) -> str:
+        return f"World({self.map_id})"